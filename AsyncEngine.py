@@ -0,0 +1,168 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# An alternative to Topology.run_spanning_tree in which every Switch runs as its own asyncio task
+# with a private inbox. Topology.send_message still validates each message and then hands it to
+# the engine, which appends it to a single queue of arrived messages without blocking. A
+# dispatcher task hands the arrived messages, in arrival order, to the inboxes of their
+# destinations, one at a time, and waits until each has been processed. Without latency every
+# message arrives as it is sent, so the delivery order and the resulting tree are exactly those
+# of the FIFO scheduler. The run ends when a quiescence detector sees that no message is queued,
+# delayed or being processed.
+#
+# Per-link latency can be simulated in scheduler ticks: a message on a link with latency k is held
+# back for k passes of the event loop before it arrives. Latencies are drawn from a seeded random
+# generator and the event loop runs ready tasks in FIFO order, so a run is fully deterministic for
+# a given seed. With latency the delivery order, and so possibly the tree when ttl_limit is too
+# small for the network to converge, differs from the FIFO scheduler's.
+
+import asyncio
+import random
+from collections import deque
+
+
+class AsyncEngine(object):
+
+    def __init__(self, topology, seed: int = 0, max_latency: int = 0):
+        """
+        topology: Topology
+            the topology to run; its scheduler is replaced by this engine for the run
+        seed: int
+            seed for the per-link latencies
+        max_latency: int
+            each link gets a latency drawn uniformly from 0..max_latency ticks (0 disables latency)
+        """
+        self.topology = topology
+        self.random = random.Random(seed)
+        self.max_latency = max_latency
+        self.latency = {}
+        self.arrived = deque()
+        self.arrival = None
+        self.inboxes = {}
+        self.tasks = []
+        self.couriers = {}
+        self.in_flight = 0
+        self.peak_depth = 0
+        self.delivered = 0
+        self.quiescent = None
+        self.failure = None
+
+    def run(self):
+        """
+        Runs the spanning tree simulation to quiescence. Drops are handled as in Topology. An
+        exception raised while a switch processes a message stops the run and is re-raised here.
+        """
+        asyncio.run(self._run())
+
+    async def _run(self):
+        self.quiescent = asyncio.Event()
+        self.arrival = asyncio.Event()
+        self.tasks.append(asyncio.get_running_loop().create_task(self._dispatch()))
+        self.topology.scheduler = self
+        self.topology.restart_topology_messages()
+        if self.in_flight == 0:
+            self.quiescent.set()
+        await self.quiescent.wait()
+        for task in self.tasks + list(self.couriers):
+            task.cancel()
+        await asyncio.gather(*self.tasks, *self.couriers, return_exceptions=True)
+        if self.failure is not None:
+            raise self.failure
+
+    def _link_latency(self, origin: int, destination: int):
+        """ Returns the latency of a link, drawing it the first time the link is used. """
+        link = (min(origin, destination), max(origin, destination))
+        if link not in self.latency:
+            self.latency[link] = self.random.randint(0, self.max_latency)
+        return self.latency[link]
+
+    def _inbox(self, switchId: int):
+        """ Returns the inbox of a switch, starting its task the first time it is needed. """
+        inbox = self.inboxes.get(switchId)
+        if inbox is None:
+            inbox = self.inboxes[switchId] = asyncio.Queue()
+            self.tasks.append(asyncio.get_running_loop().create_task(self._switch_loop(switchId, inbox)))
+        return inbox
+
+    async def _dispatch(self):
+        """ Hands the arrived messages to their destinations in arrival order, one at a time. """
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.arrived:
+                self.arrival.clear()
+                await self.arrival.wait()
+                continue
+            message = self.arrived.popleft()
+            done = loop.create_future()
+            self._inbox(message.destination).put_nowait((message, done))
+            await done
+
+    async def _switch_loop(self, switchId: int, inbox):
+        """ Processes the messages of one switch as the dispatcher hands them over. """
+        topology = self.topology
+        while True:
+            message, done = await inbox.get()
+            try:
+                topology.switches[switchId].process_message(message)
+                self.delivered += 1
+                self.in_flight -= 1
+                if message.ttl == 0 and not topology.drop_complete:
+                    topology.apply_drops()
+            except Exception as error:
+                # The run would otherwise wait forever for a message that is never finished
+                self.failure = error
+                self.quiescent.set()
+                raise
+            done.set_result(None)
+            if self.in_flight == 0:
+                self.quiescent.set()
+            # Let the other switches run between messages
+            await asyncio.sleep(0)
+
+    async def _courier(self, message, ticks: int):
+        """ Holds a message back for the latency of its link, then delivers it. """
+        for _ in range(ticks):
+            await asyncio.sleep(0)
+        del self.couriers[asyncio.current_task()]
+        self._arrive(message)
+
+    def _arrive(self, message):
+        """ Appends a message to the arrived messages and wakes the dispatcher. """
+        self.arrived.append(message)
+        self.arrival.set()
+
+    # The methods below make the engine usable as a Topology scheduler.
+
+    def push(self, message):
+        """ Queues a message for delivery, after the link latency if enabled. """
+        self.in_flight += 1
+        if self.in_flight > self.peak_depth:
+            self.peak_depth = self.in_flight
+        ticks = self._link_latency(message.origin, message.destination) if self.max_latency else 0
+        if ticks:
+            task = asyncio.get_running_loop().create_task(self._courier(message, ticks))
+            self.couriers[task] = message
+        else:
+            self._arrive(message)
+
+    def clear(self):
+        """ Discards every queued and delayed message. """
+        self.retain(lambda message: False)
+
+    def retain(self, keep):
+        """ Discards every queued or delayed message for which keep(message) is False. """
+        self.arrived = deque(message for message in self.arrived if keep(message))
+        for task, message in list(self.couriers.items()):
+            if not keep(message):
+                task.cancel()
+                del self.couriers[task]
+        self.in_flight = len(self.arrived) + len(self.couriers)
+
+    def stats(self):
+        """ Returns a dictionary summarizing the engine's activity. """
+        return {"peak_depth": self.peak_depth, "delivered": self.delivered}
+
+    def __len__(self):
+        return self.in_flight
+
+    def __bool__(self):
+        return self.in_flight > 0
@@ -0,0 +1,117 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Runs many topology files in a process pool, writing each spanning tree log and a summary table
+# with wall time, message count and the result of comparing against an expected log.
+
+import ast
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Topology import Topology
+
+
+TOPOLOGY_EXTENSIONS = (".py", ".json", ".edges", ".stpb")
+
+
+def defines_topology(path: str):
+    """
+    Returns False for a Python file that binds no module-level `topo`, such as the simulator's own
+    modules. The file is parsed, not imported; one that does not parse is kept so its error shows.
+    """
+    try:
+        with open(path, "rb") as infile:
+            tree = ast.parse(infile.read(), path)
+    except (SyntaxError, ValueError):
+        return True
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+            targets = [node.target]
+        elif isinstance(node, ast.ImportFrom):
+            if any((alias.asname or alias.name) == "topo" for alias in node.names):
+                return True
+            continue
+        else:
+            continue
+        for target in targets:
+            names = target.elts if isinstance(target, ast.Tuple) else [target]
+            if any(isinstance(name, ast.Name) and name.id == "topo" for name in names):
+                return True
+    return False
+
+
+def find_topology_files(pattern: str):
+    """
+    Expands a directory (all of its topology files) or a glob pattern into a sorted list of files.
+    Python files without a topo are left out.
+    """
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern) if name.endswith(TOPOLOGY_EXTENSIONS)]
+    else:
+        paths = glob.glob(pattern)
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and (not path.endswith(".py") or defines_topology(path)))
+
+
+def run_topology_file(path: str, output_dir: str, expected_dir: str):
+    """
+    Runs one topology file and writes <output_dir>/<name>.log. Returns a dictionary with the
+    topology name, wall time in seconds, messages delivered and a status of "pass" or "fail"
+    (compared against <expected_dir>/<name>.log), "n/a" (no expected log) or "error".
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    result = {"name": name, "seconds": 0.0, "messages": 0, "status": "n/a"}
+    logfile = os.path.join(output_dir, f"{name}.log")
+    start = time.perf_counter()
+    try:
+        topo = Topology(path)
+        topo.run_spanning_tree()
+        topo.log_spanning_tree(logfile)
+    except Exception as error:
+        result["status"] = "error"
+        result["error"] = f"{type(error).__name__}: {error}"
+        return result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+    result["messages"] = topo.scheduler.delivered
+
+    expected = os.path.join(expected_dir, f"{name}.log") if expected_dir else None
+    if expected and os.path.exists(expected):
+        with open(expected) as want, open(logfile) as got:
+            result["status"] = "pass" if want.read() == got.read() else "fail"
+    return result
+
+
+def format_summary(results: list):
+    """ Formats the per-topology results as a fixed-width text table. """
+    lines = [f"{'topology':<32} {'seconds':>10} {'messages':>12} {'status':>8}"]
+    for result in results:
+        line = f"{result['name']:<32} {result['seconds']:>10.3f} {result['messages']:>12} {result['status']:>8}"
+        if "error" in result:
+            line += f"  {result['error']}"
+        lines.append(line)
+    passed = sum(1 for result in results if result["status"] == "pass")
+    failed = sum(1 for result in results if result["status"] in ("fail", "error"))
+    lines.append(f"{len(results)} topologies, {passed} passed, {failed} failed or errored")
+    return "\n".join(lines) + "\n"
+
+
+def run_batch(pattern: str, workers: int = None, output_dir: str = ".", expected_dir: str = "Logs"):
+    """
+    Runs every topology matched by pattern using up to `workers` processes (default: one per
+    CPU), writes the logs and <output_dir>/summary.txt, and returns the list of results.
+    """
+    paths = find_topology_files(pattern)
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_topology_file, path, output_dir, expected_dir) for path in paths]
+        results = [future.result() for future in futures]
+
+    summary = format_summary(results)
+    with open(os.path.join(output_dir, "summary.txt"), "w") as out:
+        out.write(summary)
+    print(summary, end="")
+    return results
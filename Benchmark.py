@@ -0,0 +1,317 @@
+#!/usr/bin/python
+
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Benchmarks for the spanning tree simulator.
+#
+# Usage:
+#     python Benchmark.py queue [--sizes 1000 10000 100000]
+#     python Benchmark.py drops <topology_file> [<topology_file> ...]
+#     python Benchmark.py validation <topology_file> [<topology_file> ...] [--repeat 3]
+#     python Benchmark.py events <topology_file> [<topology_file> ...] [--count 4] [--seed 0] [--ttl-limit N]
+#                                [--coalesce]
+#     python Benchmark.py scaling [--families grid jellyfish] [--sizes 10 100 1000] [--ttl-limit 4]
+#                                 [--coalesce] [--early-stop | --compare-early-stop]
+#                                 [--output results.json] [--baseline previous.json]
+
+import argparse
+import json
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Convergence import ConvergenceDetector
+from LinkEvents import LinkEvent
+from Message import Message
+from Scheduler import CoalescingScheduler, FifoScheduler
+from Topology import VALIDATION_POLICIES, Topology
+from TopologyGenerator import FAMILIES, generate
+from TopologyLoader import TopologyConfig, load_config
+
+
+class _ListQueue(object):
+    """ The original list-backed queue, kept here only as a baseline for comparison. """
+
+    def __init__(self):
+        self.messages = []
+
+    def push(self, message):
+        self.messages.append(message)
+
+    def pop(self):
+        return self.messages.pop(0)
+
+    def __bool__(self):
+        return len(self.messages) > 0
+
+
+def _time_queue(queue, depth: int):
+    """
+    Replays the access pattern of Topology.run_spanning_tree against a queue: the queue is
+    filled to the given depth, then every delivered message enqueues one replacement for
+    `depth` rounds before the queue is drained. Returns the elapsed wall time in seconds.
+    """
+    message = Message(1, 0, 1, 2, False, 1)
+    start = time.perf_counter()
+    for _ in range(depth):
+        queue.push(message)
+    for _ in range(depth):
+        queue.pop()
+        queue.push(message)
+    while queue:
+        queue.pop()
+    return time.perf_counter() - start
+
+
+def bench_queue(sizes: list):
+    """ Prints the time taken by the list baseline and FifoScheduler for each queue depth. """
+    print(f"{'depth':>10} {'list (s)':>12} {'fifo (s)':>12} {'speedup':>10}")
+    for depth in sizes:
+        list_time = _time_queue(_ListQueue(), depth)
+        fifo_time = _time_queue(FifoScheduler(), depth)
+        print(f"{depth:>10} {list_time:>12.4f} {fifo_time:>12.4f} {list_time / fifo_time:>9.1f}x")
+
+
+def _drop_run(topology_file: str, incremental: bool, converge_first: bool):
+    """
+    Runs one topology with full-restart or incremental drops. Returns the number of messages
+    delivered before the drops, the number delivered after them, and the resulting log lines.
+    When converge_first is set, the drops are applied only once the network has gone quiet.
+    """
+    topo = Topology(topology_file, incremental_drops=incremental)
+    if converge_first:
+        topo.drop_complete = True
+        topo.run_spanning_tree()
+        before = topo.scheduler.delivered
+        topo.apply_drops()
+        topo.deliver_messages()
+    else:
+        counts = {}
+        apply_drops = topo.apply_drops
+
+        def record_and_apply():
+            counts["before"] = topo.scheduler.delivered
+            apply_drops()
+
+        topo.apply_drops = record_and_apply
+        topo.run_spanning_tree()
+        before = counts.get("before", topo.scheduler.delivered)
+    lines = [topo.switches[key].generate_logstring() for key in sorted(topo.switches)]
+    return before, topo.scheduler.delivered - before, lines
+
+
+def bench_drops(topology_files: list):
+    """ Prints the messages delivered after the drops for full-restart and incremental drops. """
+    print(f"{'topology':<24} {'trigger':<10} {'before':>10} {'full':>10} {'incremental':>12} {'same log':>9}")
+    for topology_file in topology_files:
+        for converge_first in (False, True):
+            before, full_after, full_lines = _drop_run(topology_file, False, converge_first)
+            _, incremental_after, incremental_lines = _drop_run(topology_file, True, converge_first)
+            trigger = "converged" if converge_first else "ttl"
+            print(f"{topology_file:<24} {trigger:<10} {before:>10} {full_after:>10} {incremental_after:>12} "
+                  f"{str(full_lines == incremental_lines):>9}")
+
+
+def bench_validation(topology_files: list, repeat: int):
+    """
+    Prints the best-of-`repeat` wall time of a full run under each validation policy, with the
+    speedup over "full", and whether every policy produced the same log.
+    """
+    print(f"{'topology':<24} {'policy':<14} {'seconds':>10} {'speedup':>8} {'same log':>9}")
+    for topology_file in topology_files:
+        baseline = None
+        expected = None
+        for policy in VALIDATION_POLICIES:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                topo = Topology(topology_file, validation=policy)
+                topo.run_spanning_tree()
+                seconds = time.perf_counter() - start
+                best = seconds if best is None else min(best, seconds)
+            lines = [topo.switches[key].generate_logstring() for key in sorted(topo.switches)]
+            if baseline is None:
+                baseline, expected = best, lines
+            print(f"{topology_file:<24} {policy:<14} {best:>10.3f} {baseline / best:>7.2f}x "
+                  f"{str(lines == expected):>9}")
+
+
+def _switch_states(topo: Topology):
+    """ Returns each switch's claim and active links, to count the switches an event changed. """
+    return {key: switch.claimed_path() + (tuple(switch.sorted_active_links()),)
+            for key, switch in topo.switches.items()}
+
+
+def _link_events(topo: Topology, count: int, rng: random.Random):
+    """
+    Returns `count` pairs of events on a converged topology, alternating between taking a random
+    link down and back up and taking a random switch down and back up.
+    """
+    links = sorted((key, link) for key, neighbors in topo.conf_topo.items() if key in topo.switches
+                   for link in neighbors if key < link)
+    events = []
+    for index in range(count):
+        if index % 2 == 0 and links:
+            a, b = rng.choice(links)
+            events += [LinkEvent(0, "link-down", a, [b]), LinkEvent(0, "link-up", a, [b])]
+        else:
+            switchId = rng.choice(sorted(topo.switches))
+            events += [LinkEvent(0, "switch-down", switchId), LinkEvent(0, "switch-up", switchId)]
+    return events
+
+
+def bench_events(topology_files: list, count: int, seed: int, ttl_limit: int, coalesce: bool):
+    """
+    Converges each topology without its drops, then applies link and switch events one at a time,
+    letting the network reconverge after each. Prints, per event, the messages delivered and wall
+    time of the live change, how many switches it changed, the same costs for re-running the
+    changed topology from scratch, and whether both give the same tree.
+    """
+    print(f"{'topology':<24} {'event':<20} {'changed':>8} {'messages':>10} {'seconds':>9} "
+          f"{'restart msgs':>12} {'restart s':>10} {'same log':>9}")
+    for topology_file in topology_files:
+        config = load_config(topology_file)
+        config.drops = []
+        if ttl_limit is not None:
+            config.ttl_limit = ttl_limit
+        topo = Topology(config, scheduler=CoalescingScheduler() if coalesce else None)
+        topo.run_spanning_tree()
+        for event in _link_events(topo, count, random.Random(seed)):
+            before = _switch_states(topo)
+            delivered = topo.scheduler.delivered
+            start = time.perf_counter()
+            event.apply(topo)
+            topo.deliver_messages()
+            seconds = time.perf_counter() - start
+            after = _switch_states(topo)
+            changed = sum(1 for key, state in after.items() if before.get(key) != state)
+
+            start = time.perf_counter()
+            restart = Topology(TopologyConfig({key: list(topo.conf_topo[key]) for key in topo.switches},
+                                              topo.ttl_limit),
+                               scheduler=CoalescingScheduler() if coalesce else None)
+            restart.run_spanning_tree()
+            restart_seconds = time.perf_counter() - start
+            same = [topo.switches[key].generate_logstring() for key in sorted(topo.switches)] == \
+                [restart.switches[key].generate_logstring() for key in sorted(restart.switches)]
+            label = str(event).split(" ", 1)[1]
+            print(f"{topology_file:<24} {label:<20} {changed:>8} {topo.scheduler.delivered - delivered:>10} "
+                  f"{seconds:>9.4f} {restart.scheduler.delivered:>12} {restart_seconds:>10.4f} {str(same):>9}")
+
+
+def _scaling_run(family: str, size: int, ttl_limit: int, drops: int, seed: int, coalesce: bool,
+                 early_stop: bool):
+    """
+    Generates and simulates one topology. Runs in a fresh worker process, so the reported peak
+    RSS (ru_maxrss, in kilobytes on Linux) belongs to this run alone.
+    """
+    config = generate(family, size, ttl_limit, drops, seed)
+    links = sum(len(neighbors) for neighbors in config.topo.values()) // 2
+    start = time.perf_counter()
+    topo = Topology(config, scheduler=CoalescingScheduler() if coalesce else None,
+                    convergence=ConvergenceDetector() if early_stop else None)
+    topo.run_spanning_tree()
+    seconds = time.perf_counter() - start
+    return {"family": family, "size": size, "ttl_limit": ttl_limit, "drops": drops, "seed": seed,
+            "coalesce": coalesce, "early_stop": early_stop, "switches": len(config.topo), "links": links,
+            "seconds": seconds,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "messages": topo.scheduler.delivered}
+
+
+def _scaling_key(result: dict):
+    return (result["family"], result["size"], result["ttl_limit"], result["drops"], result["seed"],
+            result["coalesce"], result.get("early_stop", False))
+
+
+def bench_scaling(families: list, sizes: list, ttl_limit: int, drops: int, seed: int, coalesce: bool,
+                  early_stop: bool, output: str = None, baseline: str = None, compare_early_stop: bool = False):
+    """
+    Simulates every family at every size, printing wall time, peak RSS and messages delivered.
+    Results are saved to `output` as JSON; if `baseline` names an earlier results file, each run
+    is also shown relative to the matching baseline run. With compare_early_stop, every topology
+    is run to the end and then with a ConvergenceDetector, and the second run is shown relative
+    to the first.
+    """
+    previous = {}
+    if baseline:
+        with open(baseline) as infile:
+            previous = {_scaling_key(result): result for result in json.load(infile)}
+
+    print(f"{'family':<16} {'size':>8} {'switches':>9} {'links':>9} {'seconds':>10} {'rss (KB)':>10} "
+          f"{'messages':>12} {'vs baseline':>12}")
+    results = []
+    for family in families:
+        for size in sizes:
+            full = None
+            for stop in (False, True) if compare_early_stop else (early_stop,):
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    result = pool.submit(_scaling_run, family, size, ttl_limit, drops, seed, coalesce,
+                                         stop).result()
+                results.append(result)
+                label = f"{family}+stop" if compare_early_stop and stop else family
+                line = (f"{label:<16} {size:>8} {result['switches']:>9} {result['links']:>9} "
+                        f"{result['seconds']:>10.3f} {result['peak_rss_kb']:>10} {result['messages']:>12}")
+                old = full if stop and full is not None else previous.get(_scaling_key(result))
+                if old and old["seconds"] > 0:
+                    line += f" {result['seconds'] / old['seconds']:>11.2f}x"
+                print(line)
+                full = result
+
+    if output:
+        with open(output, "w") as out:
+            json.dump(results, out, indent=1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spanning tree simulator benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    queue_parser = commands.add_parser("queue", help="list.pop(0) versus FifoScheduler scaling")
+    queue_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000, 100000, 200000])
+
+    drops_parser = commands.add_parser("drops", help="full-restart versus incremental drop message counts")
+    drops_parser.add_argument("topology_files", nargs="+")
+
+    validation_parser = commands.add_parser("validation", help="run time under each message validation policy")
+    validation_parser.add_argument("topology_files", nargs="+")
+    validation_parser.add_argument("--repeat", type=int, default=3)
+
+    events_parser = commands.add_parser("events", help="reconvergence cost of live link and switch changes")
+    events_parser.add_argument("topology_files", nargs="+")
+    events_parser.add_argument("--count", type=int, default=4, help="pairs of down/up events per topology")
+    events_parser.add_argument("--seed", type=int, default=0)
+    events_parser.add_argument("--ttl-limit", type=int, default=None, help="override the topology's ttl_limit")
+    events_parser.add_argument("--coalesce", action="store_true", help="use the CoalescingScheduler")
+
+    scaling_parser = commands.add_parser("scaling", help="wall time, peak RSS and messages across sizes")
+    scaling_parser.add_argument("--families", nargs="+", choices=FAMILIES, default=list(FAMILIES))
+    scaling_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    scaling_parser.add_argument("--ttl-limit", type=int, default=4)
+    scaling_parser.add_argument("--drops", type=int, default=0)
+    scaling_parser.add_argument("--seed", type=int, default=0)
+    scaling_parser.add_argument("--coalesce", action="store_true", help="use the CoalescingScheduler")
+    scaling_parser.add_argument("--early-stop", action="store_true", help="stop once the tree is provably stable")
+    scaling_parser.add_argument("--compare-early-stop", action="store_true",
+                                help="run every topology with and without --early-stop and compare them")
+    scaling_parser.add_argument("--output", help="save the results as JSON")
+    scaling_parser.add_argument("--baseline", help="earlier results JSON to compare against")
+
+    args = parser.parse_args()
+    if args.command == "queue":
+        bench_queue(args.sizes)
+    elif args.command == "drops":
+        bench_drops(args.topology_files)
+    elif args.command == "validation":
+        bench_validation(args.topology_files, args.repeat)
+    elif args.command == "events":
+        bench_events(args.topology_files, args.count, args.seed, args.ttl_limit, args.coalesce)
+    elif args.command == "scaling":
+        bench_scaling(args.families, args.sizes, args.ttl_limit, args.drops, args.seed, args.coalesce,
+                      args.early_stop, args.output, args.baseline, args.compare_early_stop)
+
+
+if __name__ == "__main__":
+    main()
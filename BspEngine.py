@@ -0,0 +1,165 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# A bulk-synchronous alternative to Topology.run_spanning_tree. Switch state lives in NumPy arrays
+# indexed by switch position and links are CSR edge arrays, so each round delivers every pending
+# message at once with a handful of vectorized operations instead of one Python call per message.
+#
+# Within a round each switch handles its messages as Switch.process_message would if the best
+# one (lowest root, then distance, then origin, as in _handle_distance_check) arrived first: the
+# claim is updated from it, then the pathThrough active-link rules are applied for every message.
+# Every message's ttl is decremented on delivery. A switch that received a message with ttl left
+# sends its end-of-round claim to all of its neighbors, once, with the largest remaining ttl, so
+# a newer claim on a link supersedes older ones. Drops are applied
+# after the first round in which a message's ttl reaches 0 and always restart the whole topology.
+#
+# Requires NumPy.
+
+import numpy as np
+
+
+class BspEngine(object):
+    """
+    rounds: int
+        the number of rounds run so far
+    delivered: int
+        the total number of messages delivered
+    peak_depth: int
+        the largest number of messages delivered in a single round
+    """
+
+    def __init__(self, topology):
+        """
+        topology: Topology
+            the topology to run; its switches receive the final state when the run ends
+        """
+        self.topology = topology
+        self.rounds = 0
+        self.delivered = 0
+        self.peak_depth = 0
+
+    def run(self):
+        """ Runs the spanning tree simulation until no message is left. """
+        topology = self.topology
+        self._build()
+        while True:
+            expired = self._round()
+            if expired is None:
+                break
+            if expired and not topology.drop_complete:
+                topology.drop_complete = True
+                if topology.drops:
+                    for switchId in topology.drops:
+                        topology.drop_switch(switchId)
+                    # drop_switch re-sends the initial messages through the scheduler; they are re-created here
+                    topology.scheduler.clear()
+                    self._build()
+        self._store()
+
+    def _build(self):
+        """ Indexes the live switches and their links and sends every switch's initial messages. """
+        topology = self.topology
+        self.ids = np.array(sorted(topology.switches), dtype=np.int64)
+        n = len(self.ids)
+        links = [topology.conf_topo[key] for key in self.ids.tolist()]
+        degree = np.array([len(neighbors) for neighbors in links], dtype=np.int64)
+        neighbor_ids = np.fromiter((link for neighbors in links for link in neighbors), dtype=np.int64,
+                                   count=int(degree.sum()))
+        src = np.repeat(np.arange(n, dtype=np.int64), degree)
+        dst = np.searchsorted(self.ids, neighbor_ids)
+        order = np.lexsort((dst, src))
+        self.src = src[order]
+        self.dst = dst[order]
+        # Edges are sorted by (src, dst), so an edge is found by binary search on src * n + dst
+        self.keys = self.src * n + self.dst
+        self.reverse = np.searchsorted(self.keys, self.dst * n + self.src)
+
+        positions = np.arange(n, dtype=np.int64)
+        self.root = positions.copy()
+        self.distance = np.zeros(n, dtype=np.int64)
+        self.path = positions.copy()
+        self.active = np.zeros(len(self.src), dtype=bool)
+
+        # One message per edge: the sender's claim as (root, distance, pathThrough) and its ttl
+        self.message_root = self.src.copy()
+        self.message_distance = np.zeros(len(self.src), dtype=np.int64)
+        self.message_path = np.zeros(len(self.src), dtype=bool)
+        self.ttl = np.full(len(self.src), topology.ttl_limit, dtype=np.int64)
+
+    def _edges(self, a, b):
+        """ Returns the edge indices of the links a[i] -> b[i]. """
+        return np.searchsorted(self.keys, a * len(self.ids) + b)
+
+    def _round(self):
+        """
+        Delivers every pending message. Returns None if there were none, otherwise whether any
+        delivered message's ttl reached 0.
+        """
+        pending = np.flatnonzero(self.ttl > 0)
+        if len(pending) == 0:
+            return None
+        self.rounds += 1
+        self.delivered += len(pending)
+        self.peak_depth = max(self.peak_depth, len(pending))
+
+        origin = self.src[pending]
+        receiver = self.dst[pending]
+        root = self.message_root[pending]
+        distance = self.message_distance[pending] + 1
+        ttl = self.ttl[pending] - 1
+
+        # Best message per receiver: lowest root, then distance, then origin
+        order = np.lexsort((origin, distance, root, receiver))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = receiver[order[1:]] != receiver[order[:-1]]
+        best = order[first]
+        switch = receiver[best]
+        better = (root[best] < self.root[switch]) | \
+                 ((root[best] == self.root[switch]) &
+                  ((distance[best] < self.distance[switch]) |
+                   ((distance[best] == self.distance[switch]) & (origin[best] < self.path[switch]))))
+        best = best[better]
+        switch = switch[better]
+
+        # Claim updates: the old path leaves the active links and the new one joins them
+        old_path = self.path[switch]
+        moved = old_path != switch
+        self.active[self._edges(switch[moved], old_path[moved])] = False
+        self.root[switch] = root[best]
+        self.distance[switch] = distance[best]
+        self.path[switch] = origin[best]
+        self.active[self.reverse[pending[best]]] = True
+
+        # pathThrough rules, checked against the updated path
+        through = self.message_path[pending]
+        self.active[self.reverse[pending[through]]] = True
+        leaving = ~through & (origin != self.path[receiver])
+        self.active[self.reverse[pending[leaving]]] = False
+
+        # Every switch with ttl left re-sends its claim to all of its neighbors
+        forward = np.zeros(len(self.ids), dtype=np.int64)
+        np.maximum.at(forward, receiver, ttl)
+        self.ttl = forward[self.src]
+        self.message_root = self.root[self.src]
+        self.message_distance = self.distance[self.src]
+        sender_path = self.path[self.src]
+        self.message_path = (self.dst == sender_path) | (self.src == sender_path)
+        return bool((ttl == 0).any())
+
+    def _store(self):
+        """ Copies the array state back into the topology's Switch objects. """
+        ids = self.ids
+        root = ids[self.root].tolist()
+        distance = self.distance.tolist()
+        path = ids[self.path].tolist()
+        active_src = self.src[self.active]
+        active_dst = ids[self.dst[self.active]].tolist()
+        bounds = np.searchsorted(active_src, np.arange(len(ids) + 1)).tolist()
+        for position, switchId in enumerate(ids.tolist()):
+            switch = self.topology.switches[switchId]
+            switch.restore_state(root[position], distance[position], path[position],
+                                 active_dst[bounds[position]:bounds[position + 1]],
+                                 switch.state_version + 1)
+
+    def stats(self):
+        """ Returns a dictionary summarizing the engine's activity. """
+        return {"rounds": self.rounds, "peak_depth": self.peak_depth, "delivered": self.delivered}
@@ -0,0 +1,52 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# File handling shared by the on-disk caches (TopologyCache.py and ResultCache.py): entries are
+# written next to their final name and renamed into place, so readers never see a partial file,
+# and the directory is kept under a size bound by removing the least recently used entries,
+# tracked through each file's modification time.
+
+import os
+import tempfile
+
+
+def write_atomic(path: str, write):
+    """ Calls write(temporary_path) to produce a file, then renames it to path in one step. """
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(handle)
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def evict_lru(directory: str, extension: str, max_bytes: int, keep: str = None):
+    """
+    Removes the least recently modified files ending in extension until those left in directory
+    fit in max_bytes, never removing keep. Returns the number of files removed.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(extension):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((status.st_mtime, status.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        evicted += 1
+    return evicted
@@ -0,0 +1,156 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Saves and restores the full state of a simulation: the topology, every switch's learned
+# spanning tree information, the pending message queue and the progress of the drops. A run can
+# be paused and resumed later, and a converged pre-drop state can be forked into many failure
+# experiments instead of re-simulating from zero each time.
+#
+# Checkpoint (.stpc) files are little-endian: a fixed header followed by int64 arrays holding the
+# switch IDs, per-switch degrees, the concatenated neighbor lists, the drops and the dropped
+# switches, then the (root, distance, path_through, state_version, active link count) of each
+# live switch and their concatenated active links, and finally the pending messages as columns.
+
+import struct
+import sys
+from array import array
+
+from Message import Message, MessageBatch
+from Topology import Topology
+from TopologyLoader import TopologyConfig
+
+CHECKPOINT_MAGIC = b"STPC"
+CHECKPOINT_VERSION = 1
+# magic, version, drop_complete, ttl_limit, switch count, adjacency entry count, drop count,
+# dropped count, active link count, pending message count, messages delivered, peak queue depth
+CHECKPOINT_HEADER = struct.Struct("<4sBBqqqqqqqqq")
+# Values stored per live switch, ahead of its active links
+SWITCH_FIELDS = 5
+
+
+def _write_arrays(out, *values):
+    for column in values:
+        if sys.byteorder == "big":
+            column = array(column.typecode, column)
+            column.byteswap()
+        column.tofile(out)
+
+
+def _read_array(infile, typecode: str, count: int):
+    values = array(typecode)
+    values.fromfile(infile, count)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def save_checkpoint(topology: Topology, path: str):
+    """
+    Writes the state of `topology` to `path`. The pending messages are read from the
+    topology's scheduler in delivery order, so any scheduler that can be iterated works.
+    """
+    ids = array("q", topology.conf_topo.keys())
+    degrees = array("q", (len(links) for links in topology.conf_topo.values()))
+    neighbors = array("q")
+    for links in topology.conf_topo.values():
+        neighbors.extend(links)
+    drops = array("q", topology.drops)
+    dropped = array("q", topology.dropped_switches)
+
+    switch_state = array("q")
+    active_links = array("q")
+    for switchId in ids:
+        switch = topology.switches.get(switchId)
+        if switch is None:
+            continue
+        root, distance, path_through = switch.claimed_path()
+        links = switch.sorted_active_links()
+        switch_state.extend((root, distance, path_through, switch.state_version, len(links)))
+        active_links.extend(links)
+
+    batch = MessageBatch()
+    for message in topology.scheduler:
+        batch.append_message(message)
+
+    scheduler = topology.scheduler
+    with open(path, "wb") as out:
+        out.write(CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, topology.drop_complete,
+                                         topology.ttl_limit, len(ids), len(neighbors), len(drops),
+                                         len(dropped), len(active_links), len(batch),
+                                         getattr(scheduler, "delivered", 0),
+                                         getattr(scheduler, "peak_depth", 0)))
+        _write_arrays(out, ids, degrees, neighbors, drops, dropped, switch_state, active_links,
+                      batch.root, batch.distance, batch.origin, batch.destination, batch.pathThrough,
+                      batch.ttl)
+
+
+def load_checkpoint(path: str, drops: list = None, scheduler: object = None,
+                    incremental_drops: bool = False, convergence: object = None, validation: str = "full"):
+    """
+    Returns a Topology restored from a checkpoint written by save_checkpoint. Call
+    deliver_messages() on it to continue the run; run_spanning_tree() would start over.
+
+    drops: list
+        when given, replaces the checkpoint's drops. If the checkpoint was taken before its
+        drops were applied, the new drops take effect at the usual ttl trigger, or right away
+        through apply_drops() when the saved queue is already empty.
+    scheduler, incremental_drops, convergence, validation:
+        passed to the Topology; the saved messages are pushed onto the scheduler in order
+    """
+    with open(path, "rb") as infile:
+        header = infile.read(CHECKPOINT_HEADER.size)
+        if len(header) != CHECKPOINT_HEADER.size:
+            raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint")
+        (magic, version, drop_complete, ttl_limit, switch_count, link_count, drop_count, dropped_count,
+         active_count, message_count, delivered, peak_depth) = CHECKPOINT_HEADER.unpack(header)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint")
+        ids = _read_array(infile, "q", switch_count)
+        degrees = _read_array(infile, "q", switch_count)
+        neighbors = _read_array(infile, "q", link_count)
+        saved_drops = _read_array(infile, "q", drop_count)
+        dropped = _read_array(infile, "q", dropped_count)
+        switch_state = _read_array(infile, "q", (switch_count - dropped_count) * SWITCH_FIELDS)
+        active_links = _read_array(infile, "q", active_count)
+        batch = MessageBatch()
+        batch.root = _read_array(infile, "q", message_count)
+        batch.distance = _read_array(infile, "q", message_count)
+        batch.origin = _read_array(infile, "q", message_count)
+        batch.destination = _read_array(infile, "q", message_count)
+        batch.pathThrough = _read_array(infile, "b", message_count)
+        batch.ttl = _read_array(infile, "q", message_count)
+
+    dropped = list(dropped)
+    dropped_set = set(dropped)
+    topo = {}
+    start = 0
+    for switchId, degree in zip(ids, degrees):
+        topo[switchId] = neighbors[start:start + degree].tolist()
+        start += degree
+
+    # Only the live switches are built; the dropped ones keep their conf_topo entries, as after drop_switch
+    live = TopologyConfig({key: links for key, links in topo.items() if key not in dropped_set},
+                          ttl_limit, list(saved_drops) if drops is None else list(drops))
+    topology = Topology(live, scheduler=scheduler, incremental_drops=incremental_drops,
+                        convergence=convergence, validation=validation)
+    for switchId in dropped:
+        topology.conf_topo[switchId] = topo[switchId]
+    topology.dropped_switches = dropped
+    topology.drop_complete = bool(drop_complete)
+
+    state = 0
+    link = 0
+    for switchId in ids:
+        if switchId in dropped_set:
+            continue
+        root, distance, path_through, state_version, count = switch_state[state:state + SWITCH_FIELDS]
+        topology.switches[switchId].restore_state(root, distance, path_through,
+                                                  active_links[link:link + count].tolist(), state_version)
+        state += SWITCH_FIELDS
+        link += count
+
+    for index in range(len(batch)):
+        topology.scheduler.push(batch.load(index, Message(0, 0, 0, 0, False, 0)))
+    if hasattr(topology.scheduler, "delivered"):
+        topology.scheduler.delivered = delivered
+        topology.scheduler.peak_depth = max(topology.scheduler.peak_depth, peak_depth)
+    return topology
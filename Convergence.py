@@ -0,0 +1,204 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Early termination for Topology.deliver_messages. Without it, the simulation keeps delivering
+# messages until every BPDU's ttl runs out, long after the tree has stopped changing.
+
+
+class ConvergenceDetector(object):
+    """
+    Watches Switch.state_version after every delivery. Once `window` consecutive deliveries
+    have changed no switch, the network is checked for stability:
+
+    - with require_proof set (the default), the run stops only if every pending message, and
+      the current BPDU of every switch that can still send to each of its neighbors, would
+      leave the receiving switch unchanged (Switch.is_redundant). Every future message is one
+      of those, so no switch can change again and the final tree is exactly what draining the
+      queue would produce. While any pending message would still change its destination, the
+      run simply goes on; if the BPDU check fails, the window doubles before the next attempt.
+    - without it, the quiet window alone is taken as convergence.
+
+    With require_proof, messages are queued through push, which keeps count of the pending
+    messages to each switch by (root, distance, origin, pathThrough, ttl) and of how many of
+    them the switch would not find redundant. Only the distinct fields pending to a switch are
+    checked again, and only when its state changes, so no check ever rescans the queue.
+
+    If the configured drops have not happened yet when the network is stable, they are applied
+    at that point (the tree would be the same at the ttl trigger) and detection starts over.
+
+    window: int
+        quiet deliveries before checking; defaults to the number of links in the topology
+    unsettled: int
+        the number of pending messages that would change their destination switch
+    stopped_early: bool
+        True if the last run was stopped before its queue was empty
+    """
+
+    def __init__(self, window: int = None, require_proof: bool = True):
+        self.initial_window = window
+        self.require_proof = require_proof
+        self.window = window
+        self.versions = {}
+        self.quiet = 0
+        self.checks = 0
+        self.stopped_early = False
+        # Per destination: pending message fields -> count, and the fields that would change it
+        self.pending = {}
+        self.changing = {}
+        self.unsettled = 0
+
+    def reset(self, topology):
+        """
+        Forgets all observed versions, e.g. after the switches were rebuilt by a drop, and
+        recounts the pending messages from the topology's scheduler.
+        """
+        self.versions = {}
+        self.quiet = 0
+        if self.initial_window is None:
+            self.window = max(1, sum(len(links) for links in topology.adjacency.values()) // 2)
+        else:
+            self.window = self.initial_window
+        self.pending = {}
+        self.changing = {}
+        self.unsettled = 0
+        if self.require_proof:
+            switches = topology.switches
+            for message in topology.scheduler:
+                if message.destination in switches:
+                    self._add(switches, message)
+
+    def push(self, topology, message):
+        """ Queues a message on the topology's scheduler, counting it if proof is required. """
+        scheduler = topology.scheduler
+        if not self.require_proof:
+            scheduler.push(message)
+            return
+        depth = len(scheduler)
+        scheduler.push(message)
+        # A CoalescingScheduler may drop the message instead of queueing it
+        if len(scheduler) > depth:
+            self._add(topology.switches, message)
+
+    def observe(self, topology, switch, message):
+        """
+        Records the delivery of `message` to `switch`. Returns True if the simulation should stop now.
+        """
+        changed = self.versions.get(switch.switchID) != switch.state_version
+        if self.require_proof:
+            # process_message has already taken one off the delivered message's ttl
+            self._remove(switch, message, message.ttl + 1, changed)
+        if changed:
+            self.versions[switch.switchID] = switch.state_version
+            self.quiet = 0
+            return False
+        self.quiet += 1
+        if self.quiet < self.window:
+            return False
+
+        if self.require_proof:
+            if self.unsettled:
+                # A pending message will still change a switch; wait for it without a scan
+                return False
+            self.checks += 1
+            if not self.is_stable(topology):
+                self.quiet = 0
+                self.window *= 2
+                return False
+        else:
+            self.checks += 1
+
+        if topology.drops and not topology.drop_complete:
+            # apply_drops resets this detector
+            topology.apply_drops()
+            return False
+        self.stopped_early = len(topology.scheduler) > 0
+        topology.scheduler.clear()
+        self.pending = {}
+        self.changing = {}
+        self.unsettled = 0
+        return True
+
+    def is_stable(self, topology):
+        """
+        Returns True if no pending or future message can change any switch. A switch only sends
+        when it receives a message with ttl 2 or more, so the check first bounds the largest ttl
+        that can still reach each switch and then only examines the BPDUs of switches that can
+        still send.
+        """
+        if self.unsettled:
+            return False
+        switches = topology.switches
+        reach = {}
+        buckets = {}
+        for destination, fields in self.pending.items():
+            ttl = max((key[4] for key in fields), default=0)
+            if ttl > 0 and destination in switches:
+                reach[destination] = ttl
+                buckets.setdefault(ttl, []).append(destination)
+
+        # Propagate the reachable ttl outward, highest first, like a bucketed shortest path
+        for ttl in range(max(buckets, default=0), 1, -1):
+            for switchId in buckets.get(ttl, ()):
+                if reach[switchId] != ttl:
+                    continue
+                for neighbor in switches[switchId].links:
+                    if ttl - 1 > reach.get(neighbor, 0):
+                        reach[neighbor] = ttl - 1
+                        buckets.setdefault(ttl - 1, []).append(neighbor)
+
+        for switchId, ttl in reach.items():
+            if ttl < 2:
+                continue
+            switch = switches[switchId]
+            root, distance, path_through = switch.claimed_path()
+            for neighbor in switch.links:
+                pathThrough = neighbor == path_through or switchId == path_through
+                if not switches[neighbor].is_redundant(root, distance, switchId, pathThrough):
+                    return False
+        return True
+
+    def _add(self, switches, message):
+        """ Counts a newly pending message. Only fields not already pending are checked for redundancy. """
+        destination = message.destination
+        key = (message.root, message.distance, message.origin, message.pathThrough, message.ttl)
+        fields = self.pending.get(destination)
+        if fields is None:
+            fields = self.pending[destination] = {}
+            self.changing[destination] = set()
+        count = fields.get(key)
+        if count is None:
+            fields[key] = 1
+            if not switches[destination].is_redundant(key[0], key[1], key[2], key[3]):
+                self.changing[destination].add(key)
+                self.unsettled += 1
+        else:
+            fields[key] = count + 1
+            if key in self.changing[destination]:
+                self.unsettled += 1
+
+    def _remove(self, switch, message, ttl: int, changed: bool = False):
+        """
+        Uncounts a message that left the queue with the given ttl. When the switch's state changed
+        since its messages were counted, all of them are checked again against the new state.
+        """
+        destination = message.destination
+        fields = self.pending.get(destination)
+        key = (message.root, message.distance, message.origin, message.pathThrough, ttl)
+        count = None if fields is None else fields.get(key)
+        if count is None:
+            return
+        changing = self.changing[destination]
+        if count == 1:
+            del fields[key]
+        else:
+            fields[key] = count - 1
+        if key in changing:
+            self.unsettled -= 1
+            if count == 1:
+                changing.discard(key)
+        if changed:
+            self.unsettled -= sum(fields[key] for key in changing)
+            changing.clear()
+            for key, count in fields.items():
+                if not switch.is_redundant(key[0], key[1], key[2], key[3]):
+                    changing.add(key)
+                    self.unsettled += count
@@ -0,0 +1,110 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Answers "what does the tree look like if these switches fail?" for every drop set of a given
+# size. The base topology is converged once without drops and saved as a checkpoint (see
+# Checkpoint.py); each scenario is then forked from that shared state in a worker process, has
+# its switches dropped incrementally, and is run to completion. Every scenario's spanning tree
+# log is written along with a diff of its links against the baseline tree.
+
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Checkpoint import load_checkpoint, save_checkpoint
+from Topology import Topology
+from TopologyLoader import load_config
+
+
+def tree_links(topology: Topology):
+    """ Returns the set of spanning tree links of a topology, each as a (low ID, high ID) pair. """
+    links = set()
+    for switchId, switch in topology.switches.items():
+        for neighbor in switch.sorted_active_links():
+            links.add((min(switchId, neighbor), max(switchId, neighbor)))
+    return links
+
+
+def drop_sets(switchIds, size: int):
+    """ Returns every combination of `size` switches, in increasing ID order. """
+    return list(itertools.combinations(sorted(switchIds), size))
+
+
+def run_scenario(checkpoint: str, drops: tuple, baseline: set, output_dir: str, name: str,
+                 incremental: bool = True):
+    """
+    Forks the converged checkpoint, drops the given switches and runs to completion. Writes
+    <output_dir>/<name>_drop_<ids>.log and .diff, where each diff line is "+ a - b" for a link
+    that joined the tree or "- a - b" for one that left it. Returns a dictionary with the drops,
+    wall time, messages delivered after the drop and the added and removed links.
+    """
+    start = time.perf_counter()
+    topo = load_checkpoint(checkpoint, drops=list(drops), incremental_drops=incremental)
+    delivered = topo.scheduler.delivered
+    topo.apply_drops()
+    topo.deliver_messages()
+    seconds = time.perf_counter() - start
+
+    links = tree_links(topo)
+    added = sorted(links - baseline)
+    removed = sorted(baseline - links)
+    stem = os.path.join(output_dir, f"{name}_drop_{'_'.join(str(switchId) for switchId in drops)}")
+    topo.log_spanning_tree(f"{stem}.log")
+    with open(f"{stem}.diff", "w") as out:
+        for a, b in added:
+            out.write(f"+ {a} - {b}\n")
+        for a, b in removed:
+            out.write(f"- {a} - {b}\n")
+    return {"drops": drops, "seconds": seconds, "messages": topo.scheduler.delivered - delivered,
+            "added": added, "removed": removed}
+
+
+def format_summary(results: list):
+    """ Formats the per-scenario results as a fixed-width text table. """
+    lines = [f"{'drops':<24} {'seconds':>10} {'messages':>12} {'added':>7} {'removed':>8}"]
+    for result in results:
+        drops = ",".join(str(switchId) for switchId in result["drops"])
+        lines.append(f"{drops:<24} {result['seconds']:>10.3f} {result['messages']:>12} "
+                     f"{len(result['added']):>7} {len(result['removed']):>8}")
+    unchanged = sum(1 for result in results if not result["added"] and not result["removed"])
+    lines.append(f"{len(results)} scenarios, {unchanged} without any change to the tree")
+    return "\n".join(lines) + "\n"
+
+
+def run_sweep(conf_file, size: int = 1, workers: int = None, output_dir: str = ".",
+              incremental: bool = True):
+    """
+    Converges conf_file once without drops, then evaluates every drop set of `size` switches
+    using up to `workers` processes (default: one per CPU). With incremental set (the default)
+    each scenario keeps the converged state of the switches the drop does not affect; without
+    it every scenario restarts the whole topology, as the original drop handling does. Writes
+    <output_dir>/<name>_baseline.log, the per-scenario logs and diffs and sweep.txt, and
+    returns the list of results.
+    """
+    config = load_config(conf_file)
+    config.drops = []
+    name = os.path.splitext(os.path.basename(conf_file))[0] if isinstance(conf_file, str) else "topology"
+    os.makedirs(output_dir, exist_ok=True)
+
+    base = Topology(config)
+    base.run_spanning_tree()
+    base.log_spanning_tree(os.path.join(output_dir, f"{name}_baseline.log"))
+    baseline = tree_links(base)
+
+    handle, checkpoint = tempfile.mkstemp(suffix=".stpc")
+    os.close(handle)
+    try:
+        save_checkpoint(base, checkpoint)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_scenario, checkpoint, drops, baseline, output_dir, name, incremental)
+                       for drops in drop_sets(config.topo, size)]
+            results = [future.result() for future in futures]
+    finally:
+        os.remove(checkpoint)
+
+    summary = format_summary(results)
+    with open(os.path.join(output_dir, "sweep.txt"), "w") as out:
+        out.write(summary)
+    print(summary, end="")
+    return results
@@ -0,0 +1,114 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Opt-in instrumentation for the simulator. Attaching an Instrumentation object to a Topology wraps
+# the hot-path methods of that topology and of its switches with counting versions; a topology
+# that is never attached runs the original methods untouched and pays nothing.
+
+import csv
+import json
+import time
+from collections import Counter
+
+
+class Instrumentation(object):
+    """
+    Counters collected while a Topology runs:
+
+    sent: Counter
+        messages handed to Topology.send_message, by origin switch
+    delivered: Counter
+        messages delivered to (processed by) each switch
+    state_updates: Counter
+        calls to Switch._handle_switch_updates, by switch
+    ttl_expirations: Counter
+        delivered messages whose ttl reached 0, by the switch that processed them
+    process_seconds: Counter
+        total wall time spent in Switch.process_message, by switch
+    queue_depth: list
+        (deliveries so far, pending messages) samples, taken every depth_interval deliveries
+    """
+
+    def __init__(self, depth_interval: int = 1000):
+        self.depth_interval = depth_interval
+        self.sent = Counter()
+        self.delivered = Counter()
+        self.state_updates = Counter()
+        self.ttl_expirations = Counter()
+        self.process_seconds = Counter()
+        self.queue_depth = []
+        self.deliveries = 0
+
+    def attach(self, topology):
+        """ Installs the counting wrappers on the topology and on every current and future switch. """
+        send_message = topology.send_message
+        create_switch = topology.create_switch
+
+        def counting_send_message(message):
+            self.sent[message.origin] += 1
+            send_message(message)
+
+        def instrumented_create_switch(switchId):
+            switch = create_switch(switchId)
+            self._instrument_switch(topology, switch)
+            return switch
+
+        topology.send_message = counting_send_message
+        topology.create_switch = instrumented_create_switch
+        for switch in topology.switches.values():
+            self._instrument_switch(topology, switch)
+        return self
+
+    def _instrument_switch(self, topology, switch):
+        """ Wraps process_message and _handle_switch_updates on one switch instance. """
+        switchId = switch.switchID
+        process_message = switch.process_message
+        handle_switch_updates = switch._handle_switch_updates
+
+        def timed_process_message(message):
+            start = time.perf_counter()
+            process_message(message)
+            self.process_seconds[switchId] += time.perf_counter() - start
+            self.delivered[switchId] += 1
+            if message.ttl == 0:
+                self.ttl_expirations[switchId] += 1
+            self.deliveries += 1
+            if self.deliveries % self.depth_interval == 0:
+                self.queue_depth.append((self.deliveries, len(topology.scheduler)))
+
+        def counting_handle_switch_updates(message):
+            self.state_updates[switchId] += 1
+            handle_switch_updates(message)
+
+        switch.process_message = timed_process_message
+        switch._handle_switch_updates = counting_handle_switch_updates
+
+    def per_switch(self):
+        """ Returns one row of counters per switch that sent or received anything, by switch ID. """
+        switches = sorted(set(self.sent) | set(self.delivered))
+        return [{"switch": switchId,
+                 "sent": self.sent[switchId],
+                 "delivered": self.delivered[switchId],
+                 "state_updates": self.state_updates[switchId],
+                 "ttl_expirations": self.ttl_expirations[switchId],
+                 "process_seconds": self.process_seconds[switchId]} for switchId in switches]
+
+    def export(self, filename: str):
+        """
+        Writes the counters to filename. A .csv file gets the per-switch table; anything else
+        gets JSON with the per-switch table, the totals and the queue depth samples.
+        """
+        rows = self.per_switch()
+        if filename.endswith(".csv"):
+            with open(filename, "w", newline="") as out:
+                writer = csv.DictWriter(out, fieldnames=["switch", "sent", "delivered", "state_updates",
+                                                         "ttl_expirations", "process_seconds"])
+                writer.writeheader()
+                writer.writerows(rows)
+            return
+        totals = {"sent": sum(self.sent.values()),
+                  "delivered": sum(self.delivered.values()),
+                  "state_updates": sum(self.state_updates.values()),
+                  "ttl_expirations": sum(self.ttl_expirations.values()),
+                  "process_seconds": sum(self.process_seconds.values())}
+        with open(filename, "w") as out:
+            json.dump({"totals": totals, "switches": rows, "queue_depth": self.queue_depth}, out, indent=1)
@@ -0,0 +1,121 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Scheduled link-state changes: links going down or up and switches failing or recovering at
+# chosen points of a run, given as a number of delivered messages. Each change goes through the
+# Topology's live change methods (remove_link, add_link, remove_switch, add_switch), which reset
+# only the switches whose path to the root the change broke and re-announce them from their
+# neighbors, instead of rebuilding every switch as drop_switch does.
+#
+# Event files hold one event per line; '#' starts a comment:
+#     <at> link-down <a> <b>
+#     <at> link-up <a> <b>
+#     <at> switch-down <a>
+#     <at> switch-up <a> [<neighbor> ...]     (default: the links it had before it went down)
+# An event whose delivery count is not reached before the queue empties fires once it is empty.
+
+import time
+
+EVENT_KINDS = ("link-down", "link-up", "switch-down", "switch-up")
+
+
+class LinkEvent(object):
+
+    def __init__(self, at: int, kind: str, switchId: int, others: list = None):
+        """
+        at: int
+            the number of messages delivered in the run before the event fires
+        kind: str
+            one of EVENT_KINDS
+        switchId: int
+            the switch that fails or recovers, or one end of the link
+        others: list
+            the other end of the link, or the neighbors of a recovering switch (None: as before)
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown link event: {kind}")
+        if kind in ("link-down", "link-up") and (others is None or len(others) != 1):
+            raise ValueError(f"{kind} needs the two ends of the link")
+        self.at = at
+        self.kind = kind
+        self.switchId = switchId
+        self.others = others
+
+    def apply(self, topology):
+        """ Applies the change to a topology. """
+        if self.kind == "link-down":
+            topology.remove_link(self.switchId, self.others[0])
+        elif self.kind == "link-up":
+            topology.add_link(self.switchId, self.others[0])
+        elif self.kind == "switch-down":
+            topology.remove_switch(self.switchId)
+        else:
+            topology.add_switch(self.switchId, self.others)
+
+    def __str__(self):
+        others = "" if self.others is None else "".join(f" {switchId}" for switchId in self.others)
+        return f"{self.at} {self.kind} {self.switchId}{others}"
+
+
+def load_events(path: str):
+    """ Reads an event file. Returns the events in the order they fire. """
+    events = []
+    with open(path) as infile:
+        for number, line in enumerate(infile, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            try:
+                others = [int(field) for field in fields[3:]]
+                if fields[1] == "switch-up" and not others:
+                    others = None
+                events.append(LinkEvent(int(fields[0]), fields[1], int(fields[2]), others))
+            except (IndexError, ValueError) as error:
+                raise ValueError(f"{path}:{number}: cannot parse event: {line.strip()} ({error})")
+    return sorted(events, key=lambda event: event.at)
+
+
+class EventSchedule(object):
+    """
+    results: list
+        one dictionary per applied event: the event, the messages delivered from it until the next
+        event or the end of the run, and the wall time spent applying it and delivering those
+    """
+
+    def __init__(self, events: list):
+        self.events = sorted(events, key=lambda event: event.at)
+        self.results = []
+        # The event being measured, with the delivery count and time at which it was applied
+        self.pending = None
+
+    def run(self, topology):
+        """ Runs the spanning tree simulation of a topology, applying each event when it is due. """
+        scheduler = topology.scheduler
+        topology.restart_topology_messages()
+        start = scheduler.delivered
+        for event in self.events:
+            remaining = start + event.at - scheduler.delivered
+            if remaining > 0:
+                topology.deliver_messages(remaining)
+            self._record(scheduler)
+            self.pending = (event, scheduler.delivered, time.perf_counter())
+            event.apply(topology)
+            if topology.convergence is not None:
+                topology.convergence.reset(topology)
+        topology.deliver_messages()
+        self._record(scheduler)
+
+    def _record(self, scheduler):
+        """ Records the cost of the last applied event, which ends here. """
+        if self.pending is None:
+            return
+        event, delivered, began = self.pending
+        self.results.append({"event": str(event), "delivered": scheduler.delivered - delivered,
+                             "seconds": time.perf_counter() - began})
+        self.pending = None
+
+    def format_results(self):
+        """ Formats the per-event costs as a table. """
+        lines = [f"{'event':<32} {'delivered':>10} {'seconds':>10}"]
+        for result in self.results:
+            lines.append(f"{result['event']:<32} {result['delivered']:>10} {result['seconds']:>10.4f}")
+        return "\n".join(lines) + "\n"
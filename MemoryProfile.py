@@ -0,0 +1,63 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Memory report for a finished simulation: how many messages were in flight at the peak, what a
+# message costs as an object and as a MessageBatch row, what each switch's state costs, and the
+# peak resident set size of the process. A SpillingScheduler holds its front as objects and its
+# back batch as rows, which are priced separately; their peaks may come at different times, so the
+# sum is an upper bound. Messages it wrote to disk are not counted as memory; the spill file's
+# peak size is reported on its own. Sizes come from sys.getsizeof and cover the objects the
+# simulator owns, not the interpreter's allocator overhead.
+
+import resource
+import sys
+
+from Message import Message, MessageBatch
+
+
+def switch_state_bytes(switch):
+    """ Returns the bytes held by a switch's switch_information: the dict, its values and the active link set. """
+    information = switch.switch_information
+    size = sys.getsizeof(information)
+    for key, value in information.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+        if key == switch.ACTIVE_LINKS:
+            size += sum(sys.getsizeof(link) for link in value)
+    return size
+
+
+def memory_report(topology):
+    """ Returns a dictionary describing the memory used by a topology and its scheduler. """
+    batch = MessageBatch()
+    batch.append(0, 0, 0, 0, False, 0)
+    message_bytes = sys.getsizeof(Message(0, 0, 0, 0, False, 0))
+    scheduler = topology.scheduler
+    peak = getattr(scheduler, "peak_depth", 0)
+    front = getattr(scheduler, "peak_front", peak)
+    back = getattr(scheduler, "peak_back", 0)
+    state = [switch_state_bytes(switch) for switch in topology.switches.values()]
+    report = {"peak_in_flight": peak,
+              "message_object_bytes": message_bytes,
+              "message_row_bytes": batch.nbytes(),
+              "peak_in_flight_bytes": front * message_bytes + back * batch.nbytes(),
+              "switches": len(state),
+              "switch_state_bytes_total": sum(state),
+              "switch_state_bytes_mean": sum(state) / len(state) if state else 0,
+              "switch_state_bytes_max": max(state, default=0),
+              "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    stats = scheduler.stats() if hasattr(scheduler, "stats") else {}
+    for key in ("spilled", "peak_segments", "peak_in_memory", "peak_front", "peak_back", "peak_spill_bytes"):
+        if key in stats:
+            report[key] = stats[key]
+    if hasattr(scheduler, "max_in_memory"):
+        report["max_in_memory"] = scheduler.max_in_memory
+    return report
+
+
+def format_memory_report(report: dict):
+    """ Formats a memory report as aligned "name: value" lines. """
+    width = max(len(key) for key in report)
+    lines = []
+    for key, value in report.items():
+        value = f"{value:.1f}" if isinstance(value, float) else f"{value}"
+        lines.append(f"{key:<{width}}  {value:>14}")
+    return "\n".join(lines) + "\n"
@@ -33,9 +33,14 @@
 # Copyright 2023 Vincent Hu
 #           Based on prior work by Sean Donovan, Jared Scott, James Lohse, and Michael Brown
 
+from array import array
+
 
 class Message(object):
 
+    # Fixed attribute layout: messages carry no per-instance __dict__
+    __slots__ = ("root", "distance", "origin", "destination", "pathThrough", "ttl")
+
     def __init__(self, claimedRoot: int, distanceToRoot: int, originID: int, destinationID: int, pathThrough: bool, ttl: int = 5):
         """
         root: int
@@ -75,3 +80,92 @@ class Message(object):
 
     def __str__(self):
         return (f"""Message<root: {self.root}, distance: {self.distance}, origin: {self.origin}, destination: {self.destination}, pathThrough: {self.pathThrough}, ttl: {self.ttl}>""")
+
+
+class TrustedMessage(Message):
+    """
+    A Message built by the framework (StpSwitch and Switch) from switch state that is already
+    made of validated ints. Under the "trusted" validation policy Topology.send_message
+    does not verify these; every other Message is still verified.
+    """
+
+    __slots__ = ()
+
+
+class MessageBatch(object):
+    """
+    Struct-of-arrays storage for many messages. Each message field is kept in its own
+    typed column, so a stored message costs a few machine words instead of a Python object.
+
+    root, distance, origin, destination, ttl: array of signed 64-bit ints
+    pathThrough: array of signed bytes (0 or 1)
+    """
+
+    def __init__(self):
+        self.root = array("q")
+        self.distance = array("q")
+        self.origin = array("q")
+        self.destination = array("q")
+        self.pathThrough = array("b")
+        self.ttl = array("q")
+
+    def append(self, root: int, distance: int, origin: int, destination: int, pathThrough: bool, ttl: int):
+        """ Appends one message, given field by field, to the end of the batch. """
+        self.root.append(root)
+        self.distance.append(distance)
+        self.origin.append(origin)
+        self.destination.append(destination)
+        self.pathThrough.append(pathThrough)
+        self.ttl.append(ttl)
+
+    def append_message(self, message: Message):
+        """ Appends the fields of a Message object to the end of the batch. """
+        self.append(message.root, message.distance, message.origin, message.destination,
+                    message.pathThrough, message.ttl)
+
+    def load(self, index: int, message: Message):
+        """ Copies row `index` into an existing Message object and returns that object. """
+        message.root = self.root[index]
+        message.distance = self.distance[index]
+        message.origin = self.origin[index]
+        message.destination = self.destination[index]
+        message.pathThrough = self.pathThrough[index] == 1
+        message.ttl = self.ttl[index]
+        return message
+
+    def discard_front(self, count: int):
+        """ Removes the first `count` rows from every column. """
+        for column in (self.root, self.distance, self.origin, self.destination, self.pathThrough, self.ttl):
+            del column[:count]
+
+    def tofile(self, out):
+        """ Writes every column, one after the other, to a binary file in native byte order. """
+        for column in (self.root, self.distance, self.origin, self.destination, self.pathThrough, self.ttl):
+            column.tofile(out)
+
+    def fromfile(self, infile, count: int):
+        """ Appends `count` rows read from a binary file written by tofile. """
+        for column in (self.root, self.distance, self.origin, self.destination, self.pathThrough, self.ttl):
+            column.fromfile(infile, count)
+
+    def tobytes(self):
+        """ Returns every column, one after the other, as a single bytes object in native byte order. """
+        return b"".join(column.tobytes() for column in
+                        (self.root, self.distance, self.origin, self.destination, self.pathThrough, self.ttl))
+
+    def frombytes(self, data, count: int):
+        """ Appends `count` rows from a buffer laid out by tobytes. Returns the number of bytes read. """
+        offset = 0
+        for column in (self.root, self.distance, self.origin, self.destination, self.pathThrough, self.ttl):
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+        return offset
+
+    def nbytes(self):
+        """ Returns the number of bytes used by the column data. """
+        return sum(column.itemsize * len(column) for column in
+                   (self.root, self.distance, self.origin, self.destination, self.pathThrough, self.ttl))
+
+    def __len__(self):
+        return len(self.root)
@@ -0,0 +1,400 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Runs the simulation across several worker processes. The switch graph is split into k
+# partitions by cutting a breadth-first ordering of the switches into equal, contiguous pieces, so
+# neighbors tend to share a partition. Each worker owns real Switch objects for its partition.
+#
+# The serial engine delivers messages generation by generation: the initial messages first, then
+# every message they caused, and so on, each generation in the order its messages were sent. The
+# run reproduces that order in supersteps, one generation each. Every message carries its rank,
+# its position in the serial order of its generation, and each worker delivers the messages for
+# its switches in rank order through a local FIFO (or coalescing) queue. Since a switch's state
+# only depends on the messages it receives, the resulting tree is identical to the serial one.
+#
+# A superstep has two phases. First every worker delivers its part of the generation and reports
+# how many messages each delivery sent; the coordinator turns those counts into the rank of the
+# first message sent by each delivery. Then the workers rank their new messages, keep the local
+# ones, and collect the rest per destination partition in MessageBatch columns written to one
+# block file per worker on the shared memory filesystem (/dev/shm where it exists), which the
+# receiving workers memory-map. The run terminates when no worker holds a message for the next
+# generation. Drops are applied after the superstep in which a message's ttl reached 0 and, as in
+# Topology.drop_switch, restart the whole topology.
+
+import mmap
+import multiprocessing
+import os
+import shutil
+import tempfile
+from array import array
+from collections import deque
+from heapq import merge
+from operator import itemgetter
+
+from Message import Message, MessageBatch, TrustedMessage
+from Scheduler import CoalescingScheduler, FifoScheduler
+from Switch import Switch
+
+# Bytes taken by one message in MessageBatch.tobytes: five int64 columns and one int8 column
+BATCH_ROW_BYTES = 41
+# Bytes taken by the rank of one message, written after the batch columns in a block file
+RANK_BYTES = 8
+
+
+def partition(topo: dict, count: int):
+    """
+    Returns a dictionary mapping every switch ID to a partition index in range(count). Switches
+    are ordered by a breadth-first search from the lowest ID of each connected component and
+    the order is cut into `count` pieces of (nearly) equal size.
+    """
+    order = []
+    seen = set()
+    for start in sorted(topo):
+        if start in seen:
+            continue
+        seen.add(start)
+        frontier = deque([start])
+        while frontier:
+            switchId = frontier.popleft()
+            order.append(switchId)
+            for neighbor in topo[switchId]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    frontier.append(neighbor)
+    count = max(1, min(count, len(order)))
+    return {switchId: position * count // len(order) for position, switchId in enumerate(order)}
+
+
+class _PartitionTopology(object):
+    """ Stands in for Topology inside a worker: delivers and routes the messages of the local switches. """
+
+    def __init__(self, index: int, topo: dict, owner: dict, ttl_limit: int, coalesce: bool):
+        self.index = index
+        self.conf_topo = topo
+        self.owner = owner
+        self.ttl_limit = ttl_limit
+        self.dropped = set()
+        self.queue = CoalescingScheduler() if coalesce else FifoScheduler()
+        # (rank, message) for the local switches in the next generation
+        self.next = []
+        # Messages sent in this superstep, and the rank and number of messages of every delivery that sent any
+        self.sent = []
+        self.parents = []
+        self.counts = []
+        self.switches = {key: Switch(key, self, links) for key, links in topo.items()}
+
+    def send_message(self, message: Message):
+        if type(message) is not TrustedMessage and not message.verify_message():
+            print("Message is not properly formatted")
+            return
+        if message.destination not in self.dropped:
+            self.sent.append(message)
+
+    def _record(self, rank: int, start: int):
+        """ Records the messages sent since len(self.sent) was start as sent by the delivery of the given rank. """
+        count = len(self.sent) - start
+        if count:
+            self.parents.append(rank)
+            self.counts.append(count)
+
+    def restart(self, positions: dict):
+        """
+        Discards every pending message and sends the initial messages of every local switch, each
+        switch ranked by its position in the topology, as in Topology.restart_topology_messages.
+        """
+        self.queue.clear()
+        self.next = []
+        self.sent = []
+        self.parents = []
+        self.counts = []
+        for key in sorted(self.switches, key=positions.__getitem__):
+            start = len(self.sent)
+            self.switches[key].send_initial_messages()
+            self._record(positions[key], start)
+
+    def drop(self, switchIds: list):
+        """ Removes the given switches everywhere in this partition and rebuilds the local switches. """
+        self.dropped.update(switchIds)
+        for switchId in switchIds:
+            self.conf_topo.pop(switchId, None)
+        for key, links in self.conf_topo.items():
+            links[:] = [link for link in links if link not in self.dropped]
+        self.switches = {key: Switch(key, self, links) for key, links in self.conf_topo.items()}
+
+    def deliver(self, inbound: list):
+        """
+        Delivers the local part of the next generation, merged with the inbound (rank, message)
+        pairs, in rank order. Returns (delivered, whether a ttl reached 0).
+        """
+        generation = self.next + inbound
+        generation.sort(key=itemgetter(0))
+        self.next = []
+        queue = self.queue
+        ranks = deque()
+        for rank, message in generation:
+            depth = len(queue)
+            queue.push(message)
+            # A CoalescingScheduler may drop the message instead of queueing it
+            if len(queue) > depth:
+                ranks.append(rank)
+
+        switches = self.switches
+        sent = self.sent
+        delivered = 0
+        expired = False
+        while queue:
+            msg = queue.pop()
+            start = len(sent)
+            switches[msg.destination].process_message(msg)
+            self._record(ranks.popleft(), start)
+            delivered += 1
+            if msg.ttl == 0:
+                expired = True
+        return delivered, expired
+
+    def route(self, offsets: list):
+        """
+        Ranks the messages sent in this superstep, given the rank of the first message sent by
+        each recorded delivery, and keeps those for local switches. Returns a dictionary mapping
+        every other destination partition to a (MessageBatch, ranks) pair.
+        """
+        outbound = {}
+        sent = self.sent
+        position = 0
+        for offset, count in zip(offsets, self.counts):
+            for rank in range(offset, offset + count):
+                message = sent[position]
+                position += 1
+                if message.destination in self.switches:
+                    self.next.append((rank, message))
+                    continue
+                target = outbound.get(self.owner[message.destination])
+                if target is None:
+                    target = outbound[self.owner[message.destination]] = (MessageBatch(), array("q"))
+                target[0].append_message(message)
+                target[1].append(rank)
+        self.sent = []
+        self.parents = []
+        self.counts = []
+        return outbound
+
+
+def _write_outbound(outbound: dict, path: str):
+    """
+    Writes the outbound batches, each followed by its ranks, to a new block file. Returns a
+    dictionary mapping each destination partition to the (offset, count) of its messages;
+    nothing is written if it is empty.
+    """
+    blocks = {}
+    if not outbound:
+        return blocks
+    offset = 0
+    with open(path, "wb") as out:
+        for destination in sorted(outbound):
+            batch, ranks = outbound[destination]
+            data = batch.tobytes() + ranks.tobytes()
+            blocks[destination] = (offset, len(batch))
+            out.write(data)
+            offset += len(data)
+    return blocks
+
+
+def _read_inbound(inbound: list):
+    """ Returns the (rank, message) pairs found in the given (block file, offset, count) ranges. """
+    messages = []
+    for path, offset, count in inbound:
+        with open(path, "rb") as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            batch = MessageBatch()
+            end = offset + batch.frombytes(data[offset:offset + count * BATCH_ROW_BYTES], count)
+            ranks = array("q")
+            ranks.frombytes(data[end:end + count * RANK_BYTES])
+        for index in range(count):
+            messages.append((ranks[index], batch.load(index, Message(0, 0, 0, 0, False, 0))))
+    return messages
+
+
+def _first_ranks(reports: list):
+    """
+    Given each worker's (parents, counts) report, where parents are the ascending ranks of the
+    deliveries that sent messages, returns per worker the rank of the first message each of
+    those deliveries sent in the serial order of the next generation.
+    """
+    counts = {}
+    for parents, sent in reports:
+        counts.update(zip(parents, sent))
+    first = {}
+    total = 0
+    for rank in merge(*(parents for parents, _ in reports)):
+        first[rank] = total
+        total += counts[rank]
+    return [[first[rank] for rank in parents] for parents, _ in reports]
+
+
+def _worker(conn, index: int, topo: dict, owner: dict, ttl_limit: int, coalesce: bool, directory: str):
+    """
+    Worker process loop. Commands arrive as (name, argument) pairs. After "start", "drop" and
+    "step" the worker answers with (parents, counts, delivered, expired) for the deliveries of the
+    superstep, and after "route" with (block file, blocks, local messages left).
+    """
+    env = _PartitionTopology(index, topo, owner, ttl_limit, coalesce)
+    # Block files written in the last two supersteps; a block is only read during the superstep after it
+    previous = deque()
+    step = 0
+    while True:
+        command, argument = conn.recv()
+        if command == "stop":
+            break
+        if command == "state":
+            conn.send([(key,) + switch.claimed_path() + (switch.sorted_active_links(),)
+                       for key, switch in env.switches.items()])
+            continue
+        if command == "route":
+            outbound = env.route(argument)
+            while len(previous) >= 2:
+                os.remove(previous.popleft())
+            step += 1
+            path = os.path.join(directory, f"{index}-{step}.blk")
+            blocks = _write_outbound(outbound, path)
+            if blocks:
+                previous.append(path)
+            conn.send((path, blocks, len(env.next)))
+            continue
+
+        delivered, expired = 0, False
+        if command == "start":
+            env.restart(argument)
+        elif command == "drop":
+            switchIds, positions = argument
+            env.drop(switchIds)
+            env.restart(positions)
+        elif command == "step":
+            delivered, expired = env.deliver(_read_inbound(argument))
+        conn.send((env.parents, env.counts, delivered, expired))
+    conn.close()
+
+
+class PartitionedEngine(object):
+    """
+    supersteps: int
+        the number of supersteps run so far
+    delivered: int
+        the total number of messages delivered across all workers
+    exchanged: int
+        the total number of messages sent between partitions
+    """
+
+    def __init__(self, topology, partitions: int = None, coalesce: bool = False):
+        """
+        topology: Topology
+            the topology to run; its switches receive the final state when the run ends
+        partitions: int
+            the number of partitions and worker processes; defaults to the CPU count
+        coalesce: bool
+            when True, each worker queues its local messages in a CoalescingScheduler
+        """
+        self.topology = topology
+        self.partitions = partitions if partitions is not None else (os.cpu_count() or 1)
+        self.coalesce = coalesce
+        self.supersteps = 0
+        self.delivered = 0
+        self.exchanged = 0
+
+    def run(self):
+        """ Runs the spanning tree simulation to termination and stores the final switch state. """
+        topology = self.topology
+        live = {key: list(topology.conf_topo[key]) for key in topology.switches}
+        owner = partition(live, self.partitions)
+        count = max(owner.values(), default=0) + 1
+        local = [{} for _ in range(count)]
+        for key, links in live.items():
+            local[owner[key]][key] = links
+
+        # Block files live on the shared memory filesystem when there is one
+        directory = tempfile.mkdtemp(prefix="stp-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+        connections = []
+        processes = []
+        try:
+            for index in range(count):
+                parent, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_worker,
+                                                  args=(child, index, local[index], owner, topology.ttl_limit,
+                                                        self.coalesce, directory))
+                process.start()
+                child.close()
+                connections.append(parent)
+                processes.append(process)
+
+            positions = self._positions(list(topology.switches), owner, count)
+            commands = [("start", positions[index]) for index in range(count)]
+            while True:
+                reports = self._exchange(connections, commands)
+                self.supersteps += 1
+                for report in reports:
+                    self.delivered += report[2]
+                if any(report[3] for report in reports) and not topology.drop_complete:
+                    topology.drop_complete = True
+                    if topology.drops:
+                        # Messages still in flight belong to the topology before the drop
+                        live = [key for key in topology.switches if key not in topology.drops]
+                        positions = self._positions(live, owner, count)
+                        commands = [("drop", (list(topology.drops), positions[index])) for index in range(count)]
+                        continue
+
+                first = _first_ranks([(report[0], report[1]) for report in reports])
+                routes = self._exchange(connections, [("route", ranks) for ranks in first])
+                inbound = [[] for _ in range(count)]
+                for name, blocks, _ in routes:
+                    for destination, (offset, size) in blocks.items():
+                        inbound[destination].append((name, offset, size))
+                        self.exchanged += size
+                if not any(inbound) and not any(route[2] for route in routes):
+                    break
+                commands = [("step", inbound[index]) for index in range(count)]
+
+            states = []
+            for conn in connections:
+                conn.send(("state", None))
+            for conn in connections:
+                states.extend(conn.recv())
+        finally:
+            for conn in connections:
+                try:
+                    conn.send(("stop", None))
+                except OSError:
+                    # The worker already exited, e.g. after an error
+                    pass
+            for process in processes:
+                process.join()
+            shutil.rmtree(directory, ignore_errors=True)
+
+        self._store(states)
+
+    def _exchange(self, connections: list, commands: list):
+        """ Sends every worker its command and returns the answers in worker order. """
+        for conn, command in zip(connections, commands):
+            conn.send(command)
+        return [conn.recv() for conn in connections]
+
+    @staticmethod
+    def _positions(order: list, owner: dict, count: int):
+        """ Returns, per partition, a dictionary mapping each of its switches to its position in order. """
+        positions = [{} for _ in range(count)]
+        for position, key in enumerate(order):
+            positions[owner[key]][key] = position
+        return positions
+
+    def _store(self, states: list):
+        """ Applies the drops to the topology and copies the workers' switch state into it. """
+        topology = self.topology
+        if topology.drop_complete and topology.drops:
+            for switchId in topology.drops:
+                topology.drop_switch(switchId)
+            # drop_switch re-sends the initial messages through the scheduler; the workers have delivered them
+            topology.scheduler.clear()
+        for switchId, root, distance, path_through, active_links in states:
+            switch = topology.switches[switchId]
+            switch.restore_state(root, distance, path_through, active_links, switch.state_version + 1)
+
+    def stats(self):
+        """ Returns a dictionary summarizing the engine's activity. """
+        return {"partitions": self.partitions, "supersteps": self.supersteps, "delivered": self.delivered,
+                "exchanged": self.exchanged}
@@ -0,0 +1,158 @@
+#!/usr/bin/python
+
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Centralized reference solver used to verify the distributed Switch implementation. The topology
+# is stored as CSR adjacency arrays, and a vectorized breadth-first search from the lowest switch ID
+# of every connected component computes each switch's root, distance and parent. Ties between
+# equally distant parents go to the lowest switch ID, as in Switch.process_message.
+#
+# The solver produces the converged tree. A simulation whose ttl_limit is too small to converge
+# may legitimately differ from it.
+#
+# Usage:
+#     python ReferenceSolver.py <topology_file> [--compare <logfile>] [--output <logfile>]
+# Requires NumPy.
+
+import argparse
+import sys
+
+import numpy as np
+
+from TopologyLoader import load_config
+
+
+class ReferenceSolver(object):
+
+    def __init__(self, topo: dict, drops: list = ()):
+        """
+        topo: dict
+            maps every switch ID to the list of switch IDs it links to
+        drops: list
+            switch IDs removed from the topology before solving
+
+        After construction the following arrays are available, indexed by position in ids:
+
+        ids: array of switch IDs in increasing order
+        indptr, indices: CSR adjacency (neighbors of ids[i] are ids[indices[indptr[i]:indptr[i + 1]]])
+        root, distance, parent: positions of each switch's root and parent, and its hop count
+        """
+        dropped = set(drops)
+        self.ids = np.array(sorted(key for key in topo if key not in dropped), dtype=np.int64)
+        n = len(self.ids)
+
+        degree = np.zeros(n, dtype=np.int64)
+        neighbor_ids = []
+        for position, key in enumerate(self.ids.tolist()):
+            links = [link for link in topo[key] if link not in dropped]
+            degree[position] = len(links)
+            neighbor_ids.extend(links)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degree, out=self.indptr[1:])
+        self.indices = np.searchsorted(self.ids, np.array(neighbor_ids, dtype=np.int64))
+        self.sources = np.repeat(np.arange(n, dtype=np.int64), degree)
+
+        self.root = self._component_minimum()
+        self.distance = self._bfs_distance()
+        self.parent = self._lowest_parent()
+
+    def _component_minimum(self):
+        """ Labels every switch with the lowest position in its connected component. """
+        label = np.arange(len(self.ids), dtype=np.int64)
+        while True:
+            updated = label.copy()
+            np.minimum.at(updated, self.sources, label[self.indices])
+            # Pointer jumping: adopt the label of the switch we currently point at
+            updated = updated[updated]
+            if np.array_equal(updated, label):
+                return label
+            label = updated
+
+    def _bfs_distance(self):
+        """ Runs a multi-source, level-synchronous BFS outward from every component root. """
+        n = len(self.ids)
+        distance = np.full(n, -1, dtype=np.int64)
+        frontier = np.flatnonzero(self.root == np.arange(n))
+        distance[frontier] = 0
+        level = 0
+        while len(frontier):
+            level += 1
+            starts = self.indptr[frontier]
+            counts = self.indptr[frontier + 1] - starts
+            # Gather the CSR slices of every frontier switch in one shot
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            edges = offsets + np.arange(counts.sum(), dtype=np.int64)
+            reached = np.unique(self.indices[edges])
+            frontier = reached[distance[reached] == -1]
+            distance[frontier] = level
+        return distance
+
+    def _lowest_parent(self):
+        """ Picks, for every non-root switch, the lowest neighbor one hop closer to the root. """
+        n = len(self.ids)
+        parent = np.full(n, n, dtype=np.int64)
+        closer = self.distance[self.indices] == self.distance[self.sources] - 1
+        np.minimum.at(parent, self.sources[closer], self.indices[closer])
+        roots = self.distance == 0
+        parent[roots] = np.flatnonzero(roots)
+        return parent
+
+    def active_links(self):
+        """
+        Returns (switch, link) position arrays for every spanning tree link in both directions,
+        ordered by switch and then by link.
+        """
+        children = np.flatnonzero(self.distance > 0)
+        switch = np.concatenate((children, self.parent[children]))
+        link = np.concatenate((self.parent[children], children))
+        order = np.lexsort((link, switch))
+        return switch[order], link[order]
+
+    def log_lines(self):
+        """ Yields one line per switch, formatted like Switch.generate_logstring. """
+        switch, link = self.active_links()
+        ids = self.ids.tolist()
+        link_ids = self.ids[link].tolist()
+        bounds = np.searchsorted(switch, np.arange(len(ids) + 1)).tolist()
+        for position, key in enumerate(ids):
+            start, end = bounds[position], bounds[position + 1]
+            if start == end:
+                yield f"{key}"
+            else:
+                yield ", ".join(f"{key} - {other}" for other in link_ids[start:end])
+
+    def log_spanning_tree(self, filename: str):
+        """ Writes the reference tree in the same format as Topology.log_spanning_tree. """
+        with open(filename, 'w') as out:
+            for line in self.log_lines():
+                out.write(line + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference spanning tree solver")
+    parser.add_argument("topology_file")
+    parser.add_argument("--compare", help="log file to check against the reference tree")
+    parser.add_argument("--output", help="where to write the reference log")
+    args = parser.parse_args()
+
+    conf = load_config(args.topology_file)
+    solver = ReferenceSolver(conf.topo, conf.drops)
+
+    if args.output:
+        solver.log_spanning_tree(args.output)
+    if args.compare:
+        with open(args.compare) as logfile:
+            actual = logfile.read().splitlines()
+        expected = list(solver.log_lines())
+        mismatches = [(want, got) for want, got in zip(expected, actual) if want != got]
+        if len(expected) != len(actual):
+            print(f"Line count differs: expected {len(expected)}, found {len(actual)}")
+        for want, got in mismatches:
+            print(f"expected: {want}\n   found: {got}")
+        if mismatches or len(expected) != len(actual):
+            sys.exit(1)
+        print(f"{args.compare} matches the reference tree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Memoizes finished simulations. A run is deterministic given its topology, ttl_limit and drops,
+# the delivery options (scheduler class, incremental drops, convergence detection) and the code
+# that implements the switches, delivery and queue. ResultCache.run stands in front of
+# Topology.run_spanning_tree and log_spanning_tree: on a hit, the converged switch_information is
+# restored into the topology and the log text is written as stored, without delivering a message.
+#
+# Results live in an in-process tier, bounded by memory_bytes, and optionally in an on-disk tier
+# of one file per key, bounded by disk_bytes; both evict the least recently used results. A disk
+# hit is promoted to the in-process tier. Both tiers hold the same little-endian encoding: a
+# header, int64 arrays with the (switch ID, root, distance, path_through, active link count) of
+# every live switch, their concatenated active links and the dropped switches, then the UTF-8 log.
+
+import gzip
+import hashlib
+import inspect
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+from CacheFiles import evict_lru, write_atomic
+from Convergence import ConvergenceDetector
+from Message import Message
+from TopologyCache import config_digest
+from TopologyLoader import TopologyConfig
+
+RESULT_MAGIC = b"STPR"
+RESULT_VERSION = 1
+# magic, version, live switch count, active link count, dropped count, log byte count
+RESULT_HEADER = struct.Struct("<4sBqqqq")
+RESULT_EXTENSION = ".stpr"
+# Values stored per live switch, ahead of the active links
+SWITCH_FIELDS = 5
+
+
+def implementation_version(*classes):
+    """
+    Returns a hex digest of the source files defining the given classes and their base classes,
+    so a cached result is never reused after the code that produced it changed.
+    """
+    digest = hashlib.sha256()
+    files = set()
+    for cls in classes:
+        for base in inspect.getmro(cls):
+            if base is object:
+                continue
+            digest.update(f"{base.__module__}.{base.__qualname__}\n".encode())
+            try:
+                files.add(inspect.getsourcefile(base))
+            except TypeError:
+                # Built-in classes have no source file; their name is all there is to hash
+                pass
+    for path in sorted(path for path in files if path):
+        with open(path, "rb") as infile:
+            digest.update(infile.read())
+    return digest.hexdigest()
+
+
+def encode_result(topology):
+    """ Returns the encoded converged state and text log of a finished topology. """
+    state = array("q")
+    active_links = array("q")
+    for switchId in sorted(topology.switches):
+        switch = topology.switches[switchId]
+        links = switch.sorted_active_links()
+        state.extend((switchId,) + switch.claimed_path() + (len(links),))
+        active_links.extend(links)
+    dropped = array("q", topology.dropped_switches)
+    log = "".join(topology.log_chunks()).encode()
+    if sys.byteorder == "big":
+        for values in (state, active_links, dropped):
+            values.byteswap()
+    return b"".join((RESULT_HEADER.pack(RESULT_MAGIC, RESULT_VERSION, len(state) // SWITCH_FIELDS,
+                                        len(active_links), len(dropped), len(log)),
+                     state.tobytes(), active_links.tobytes(), dropped.tobytes(), log))
+
+
+def _check_header(data: bytes):
+    """ Returns the counts in a result's header, raising ValueError unless the data is a whole result. """
+    if len(data) < RESULT_HEADER.size:
+        raise ValueError("truncated result")
+    magic, version, switch_count, link_count, dropped_count, log_size = RESULT_HEADER.unpack_from(data)
+    if magic != RESULT_MAGIC or version != RESULT_VERSION:
+        raise ValueError(f"not a version {RESULT_VERSION} result")
+    if len(data) != RESULT_HEADER.size + 8 * (switch_count * SWITCH_FIELDS + link_count + dropped_count) + log_size:
+        raise ValueError("truncated result")
+    return switch_count, link_count, dropped_count, log_size
+
+
+def decode_result(data: bytes):
+    """
+    Returns (states, dropped, log) from an encoded result, where states is a list of
+    (switch ID, root, distance, path_through, active links) tuples.
+    """
+    switch_count, link_count, dropped_count, log_size = _check_header(data)
+    offset = RESULT_HEADER.size
+    columns = []
+    for count in (switch_count * SWITCH_FIELDS, link_count, dropped_count):
+        values = array("q")
+        values.frombytes(data[offset:offset + count * values.itemsize])
+        if sys.byteorder == "big":
+            values.byteswap()
+        columns.append(values)
+        offset += count * values.itemsize
+    state, active_links, dropped = columns
+    log = data[offset:offset + log_size].decode()
+
+    states = []
+    link = 0
+    for start in range(0, len(state), SWITCH_FIELDS):
+        switchId, root, distance, path_through, count = state[start:start + SWITCH_FIELDS]
+        states.append((switchId, root, distance, path_through, active_links[link:link + count].tolist()))
+        link += count
+    return states, dropped.tolist(), log
+
+
+class ResultCache(object):
+    """
+    hits: int
+        the number of runs served from the in-process tier
+    disk_hits: int
+        the number of runs served from the on-disk tier
+    misses: int
+        the number of runs that were simulated
+    evicted: int
+        the number of results evicted from either tier
+    """
+
+    def __init__(self, directory: str = None, memory_bytes: int = 256 << 20, disk_bytes: int = 1 << 30):
+        """
+        directory: str
+            where the on-disk tier keeps its files; None keeps results in this process only
+        memory_bytes: int
+            the total size of the results kept in the in-process tier
+        disk_bytes: int
+            the total size of the result files kept on disk
+        """
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evicted = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, topology):
+        """
+        Returns the cache key of a topology that has not run yet: a digest of its config, the
+        delivery options and the implementation of its switch, topology, scheduler, convergence
+        detection and message classes.
+        """
+        config = TopologyConfig(topology.conf_topo, topology.ttl_limit, topology.drops)
+        convergence = topology.convergence
+        options = (f"incremental_drops={topology.incremental_drops} "
+                   f"scheduler={type(topology.scheduler).__qualname__} "
+                   f"convergence={None if convergence is None else (convergence.initial_window, convergence.require_proof)}")
+        switch_class = type(next(iter(topology.switches.values()))) if topology.switches else object
+        digest = hashlib.sha256()
+        for part in (config_digest(config), options,
+                     implementation_version(switch_class, type(topology), type(topology.scheduler),
+                                            ConvergenceDetector, Message)):
+            digest.update(part.encode() + b"\n")
+        return digest.hexdigest()
+
+    def run(self, topology, filename: str = None):
+        """
+        Runs the spanning tree simulation of a topology that has not run yet, or restores its
+        result from the cache, then writes the log to filename (as log_spanning_tree would) if
+        one is given. Returns True if the result came from the cache.
+        """
+        key = self.key(topology)
+        data = self.get(key)
+        if data is None:
+            self.misses += 1
+            topology.run_spanning_tree()
+            self.put(key, encode_result(topology))
+            log = None
+        else:
+            states, dropped, log = decode_result(data)
+            self.restore(topology, states, dropped)
+
+        if filename is not None:
+            if log is None or filename.endswith(".stpb"):
+                topology.log_spanning_tree(filename)
+            else:
+                opener = gzip.open if filename.endswith(".gz") else open
+                with opener(filename, "wt") as out:
+                    out.write(log)
+        return log is not None
+
+    def restore(self, topology, states: list, dropped: list):
+        """ Removes the dropped switches from the topology and restores every switch's converged state. """
+        for switchId in dropped:
+            topology.detach_switch(switchId)
+        topology.drop_complete = True
+        topology.scheduler.clear()
+        for switchId, root, distance, path_through, active_links in states:
+            switch = topology.switches[switchId]
+            switch.restore_state(root, distance, path_through, active_links, switch.state_version + 1)
+
+    def get(self, key: str):
+        """ Returns the encoded result for key, or None, checking the in-process tier first. """
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return data
+        if self.directory is None:
+            return None
+        path = self.path(key)
+        try:
+            with open(path, "rb") as infile:
+                data = infile.read()
+            _check_header(data)
+        except (FileNotFoundError, ValueError):
+            # Missing, or cut short by a writer that died; simulate it again
+            return None
+        os.utime(path)
+        self.disk_hits += 1
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """ Stores an encoded result in both tiers. """
+        self._remember(key, data)
+        if self.directory is None:
+            return
+        path = self.path(key)
+        write_atomic(path, lambda temporary: self._write(temporary, data))
+        self.evicted += evict_lru(self.directory, RESULT_EXTENSION, self.disk_bytes, keep=path)
+
+    def path(self, key: str):
+        """ Returns the path of the on-disk result file for a key. """
+        return os.path.join(self.directory, key + RESULT_EXTENSION)
+
+    def _remember(self, key: str, data: bytes):
+        if key in self.memory:
+            self.memory_used -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_used += len(data)
+        # The newest result is kept even when it alone exceeds the bound
+        while self.memory_used > self.memory_bytes and len(self.memory) > 1:
+            _, old = self.memory.popitem(last=False)
+            self.memory_used -= len(old)
+            self.evicted += 1
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        with open(path, "wb") as out:
+            out.write(data)
+
+    def stats(self):
+        """ Returns a dictionary summarizing the cache's activity. """
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "evicted": self.evicted, "memory_entries": len(self.memory), "memory_used": self.memory_used}
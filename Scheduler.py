@@ -0,0 +1,508 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Defines the message schedulers used by Topology to hold in-flight messages between the time a
+# switch sends them and the time they are delivered to the destination switch.
+
+import heapq
+import tempfile
+from collections import deque
+
+from Message import Message, MessageBatch
+from TopologyLoader import link_key
+
+
+class FifoScheduler(object):
+    """
+    First-in, first-out message queue backed by a deque, giving O(1) push and pop.
+    Delivery order is identical to appending to and popping from the front of a list.
+
+    Messages on given links can be discarded without scanning the queue (see discard): the
+    queue remembers, per link, how many messages had been pushed at that point, and drops the
+    older ones on the link as they reach the front. len() counts them until then.
+
+    peak_depth: int
+        the largest number of messages held at once since creation
+    delivered: int
+        the total number of messages handed out by pop()
+    discarded: int
+        the total number of messages dropped by discard()
+    """
+
+    def __init__(self):
+        self.queue = deque()
+        self.peak_depth = 0
+        self.delivered = 0
+        self.discarded = 0
+        # (origin, destination) -> push count before which the link's messages are discarded
+        self.stale = {}
+        self.stale_until = 0
+
+    def push(self, message):
+        """ Adds a message to the back of the queue. """
+        self.queue.append(message)
+        if len(self.queue) > self.peak_depth:
+            self.peak_depth = len(self.queue)
+
+    def pop(self):
+        """ Removes and returns the message at the front of the queue. """
+        message = self.queue.popleft()
+        self.delivered += 1
+        if self.stale:
+            self._skip_stale()
+        return message
+
+    def discard(self, links):
+        """
+        Discards every pending message on the given (origin, destination) links. Messages pushed
+        afterwards are kept. The cost depends on the number of links, not on the queue length.
+        """
+        self.stale_until = self.delivered + self.discarded + len(self.queue)
+        for link in links:
+            self.stale[link] = self.stale_until
+        self._skip_stale()
+
+    def _skip_stale(self):
+        """ Drops discarded messages from the front of the queue, so the front is always live. """
+        queue = self.queue
+        stale = self.stale
+        while queue:
+            # The position of the front message in push order
+            position = self.delivered + self.discarded
+            if position >= self.stale_until:
+                break
+            message = queue[0]
+            if position >= stale.get((message.origin, message.destination), 0):
+                return
+            queue.popleft()
+            self.discarded += 1
+        stale.clear()
+
+    def clear(self):
+        """ Discards all pending messages. Statistics are kept across clears. """
+        self.queue.clear()
+        self.stale.clear()
+
+    def retain(self, keep):
+        """ Discards every pending message for which keep(message) is False, preserving order. """
+        self.queue = deque(message for message in self if keep(message))
+        self.stale.clear()
+
+    def stats(self):
+        """ Returns a dictionary summarizing the scheduler's activity. """
+        return {"peak_depth": self.peak_depth, "delivered": self.delivered}
+
+    def __iter__(self):
+        if not self.stale:
+            return iter(self.queue)
+        return self._live()
+
+    def _live(self):
+        """ Yields the pending messages that have not been discarded, in delivery order. """
+        stale = self.stale
+        for position, message in enumerate(self.queue, self.delivered + self.discarded):
+            if position >= self.stale_until or position >= stale.get((message.origin, message.destination), 0):
+                yield message
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __bool__(self):
+        return len(self.queue) > 0
+
+
+class BatchScheduler(object):
+    """
+    First-in, first-out message queue that stores pending messages as columns in a
+    MessageBatch instead of as Message objects. Messages are copied into the batch on
+    push and copied back out into a single reused Message object on pop, so the caller
+    must be done with a popped message before popping the next one.
+
+    peak_depth: int
+        the largest number of messages held at once since creation
+    delivered: int
+        the total number of messages handed out by pop()
+    """
+
+    # Consumed rows are only trimmed once at least this many have accumulated
+    COMPACT_THRESHOLD = 4096
+
+    def __init__(self):
+        self.batch = MessageBatch()
+        self.head = 0
+        self.cursor = Message(0, 0, 0, 0, False, 0)
+        self.peak_depth = 0
+        self.delivered = 0
+
+    def push(self, message):
+        """ Copies a message to the back of the queue. """
+        self.batch.append_message(message)
+        depth = len(self.batch) - self.head
+        if depth > self.peak_depth:
+            self.peak_depth = depth
+
+    def pop(self):
+        """ Returns the message at the front of the queue, loaded into the shared cursor. """
+        message = self.batch.load(self.head, self.cursor)
+        self.head += 1
+        self.delivered += 1
+        # Trim consumed rows once they make up at least half of the batch, so the cost is amortized O(1)
+        if self.head >= self.COMPACT_THRESHOLD and self.head * 2 >= len(self.batch):
+            self.batch.discard_front(self.head)
+            self.head = 0
+        return message
+
+    def clear(self):
+        """ Discards all pending messages. Statistics are kept across clears. """
+        self.batch = MessageBatch()
+        self.head = 0
+
+    def retain(self, keep):
+        """ Discards every pending message for which keep(message) is False, preserving order. """
+        batch = MessageBatch()
+        message = Message(0, 0, 0, 0, False, 0)
+        for index in range(self.head, len(self.batch)):
+            if keep(self.batch.load(index, message)):
+                batch.append_message(message)
+        self.batch = batch
+        self.head = 0
+
+    def stats(self):
+        """ Returns a dictionary summarizing the scheduler's activity. """
+        return {"peak_depth": self.peak_depth, "delivered": self.delivered}
+
+    def __iter__(self):
+        """ Yields each pending message as a new Message object, in delivery order. """
+        for index in range(self.head, len(self.batch)):
+            yield self.batch.load(index, Message(0, 0, 0, 0, False, 0))
+
+    def __len__(self):
+        return len(self.batch) - self.head
+
+    def __bool__(self):
+        return len(self.batch) > self.head
+
+
+class CoalescingScheduler(FifoScheduler):
+    """
+    FIFO message queue that drops messages whose delivery could not change anything. A message
+    is dropped when it repeats the root, distance, pathThrough and ttl of the newest message
+    still waiting on the same (origin, destination) link and has a ttl of 1: the receiver
+    handles it exactly like the copy ahead of it, and with no ttl left after delivery it sends
+    nothing and cannot be the first to trigger the drops. Any other message is queued, since
+    a later delivery is what makes the receiver broadcast the state it has reached by then.
+    The resulting tree is the same as FifoScheduler's.
+
+    coalesced: int
+        the number of messages dropped as duplicates instead of queued
+    """
+
+    def __init__(self):
+        super(CoalescingScheduler, self).__init__()
+        # The newest queued message on each link
+        self.pending = {}
+        self.coalesced = 0
+
+    def push(self, message):
+        """ Drops the message if it duplicates the newest message waiting on its link, or queues it. """
+        link = (message.origin, message.destination)
+        waiting = self.pending.get(link)
+        if (waiting is not None and message.ttl <= 1 and waiting.ttl == message.ttl
+                and waiting.root == message.root and waiting.distance == message.distance
+                and waiting.pathThrough == message.pathThrough):
+            self.coalesced += 1
+            return
+        self.pending[link] = message
+        super(CoalescingScheduler, self).push(message)
+
+    def pop(self):
+        """ Removes and returns the message at the front of the queue. """
+        message = super(CoalescingScheduler, self).pop()
+        link = (message.origin, message.destination)
+        if self.pending.get(link) is message:
+            del self.pending[link]
+        return message
+
+    def discard(self, links):
+        """ Discards every pending message on the given (origin, destination) links. """
+        links = list(links)
+        for link in links:
+            self.pending.pop(link, None)
+        super(CoalescingScheduler, self).discard(links)
+
+    def clear(self):
+        """ Discards all pending messages. Statistics are kept across clears. """
+        super(CoalescingScheduler, self).clear()
+        self.pending = {}
+
+    def retain(self, keep):
+        """ Discards every pending message for which keep(message) is False, preserving order. """
+        super(CoalescingScheduler, self).retain(keep)
+        self.pending = {(message.origin, message.destination): message for message in self.queue}
+
+    def saved_percent(self):
+        """ Returns the percentage of sent messages that were dropped instead of delivered. """
+        total = self.coalesced + self.delivered + len(self.queue)
+        return 100.0 * self.coalesced / total if total else 0.0
+
+    def stats(self):
+        """ Returns a dictionary summarizing the scheduler's activity, including coalescing savings. """
+        stats = super(CoalescingScheduler, self).stats()
+        stats["coalesced"] = self.coalesced
+        stats["saved_percent"] = self.saved_percent()
+        return stats
+
+
+class SpillingScheduler(object):
+    """
+    First-in, first-out message queue that holds at most `max_in_memory` messages in memory and
+    spills the rest to a temporary file. The oldest messages wait at the front as objects; newer
+    ones collect in a column-backed MessageBatch that is appended to the file as a segment
+    whenever it reaches `segment_size` messages. Segments are read back, oldest first, as the
+    front drains, and the file is truncated whenever every segment in it has been read. The
+    front takes at most max_in_memory - segment_size messages, and segment_size is at most half
+    of max_in_memory, so the front and the back batch together never exceed max_in_memory.
+    Delivery order is the same as FifoScheduler's, so the resulting tree is identical; only the
+    memory use changes.
+
+    peak_depth: int
+        the largest number of messages held at once since creation
+    delivered: int
+        the total number of messages handed out by pop()
+    spilled: int
+        the total number of messages written to segment files
+    peak_segments: int
+        the largest number of segments on disk at once
+    peak_in_memory: int
+        the largest number of messages held in memory, as objects or batch rows, at once
+    peak_front, peak_back: int
+        the largest number of messages held at once as objects at the front and as rows in the back batch
+    peak_spill_bytes: int
+        the largest size of the spill file
+    """
+
+    def __init__(self, max_in_memory: int = 1000000, segment_size: int = None):
+        if max_in_memory < 2:
+            raise ValueError("max_in_memory must be at least 2")
+        if segment_size is None:
+            segment_size = max_in_memory // 2
+        if not 1 <= segment_size <= max_in_memory // 2:
+            raise ValueError("segment_size must be between 1 and half of max_in_memory")
+        self.max_in_memory = max_in_memory
+        self.segment_size = segment_size
+        self.front_limit = max_in_memory - segment_size
+        self.front = deque()
+        self.spill = None
+        self.segments = deque()
+        self.back = MessageBatch()
+        self.depth = 0
+        self.peak_depth = 0
+        self.delivered = 0
+        self.spilled = 0
+        self.peak_segments = 0
+        self.peak_in_memory = 0
+        self.peak_front = 0
+        self.peak_back = 0
+        self.peak_spill_bytes = 0
+
+    def push(self, message):
+        """ Adds a message to the back of the queue, spilling a full batch of new messages to disk. """
+        if not self.segments and len(self.back) == 0 and len(self.front) < self.front_limit:
+            self.front.append(message)
+            if len(self.front) > self.peak_front:
+                self.peak_front = len(self.front)
+        else:
+            self.back.append_message(message)
+            if len(self.back) > self.peak_back:
+                self.peak_back = len(self.back)
+        self.depth += 1
+        if self.depth > self.peak_depth:
+            self.peak_depth = self.depth
+        if len(self.front) + len(self.back) > self.peak_in_memory:
+            self.peak_in_memory = len(self.front) + len(self.back)
+        if len(self.back) >= self.segment_size:
+            self._spill()
+
+    def _spill(self):
+        """ Appends the back batch to the spill file as a new segment. """
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile()
+        self.spill.seek(0, 2)
+        self.segments.append((self.spill.tell(), len(self.back)))
+        self.back.tofile(self.spill)
+        self.peak_spill_bytes = max(self.peak_spill_bytes, self.spill.tell())
+        self.spilled += len(self.back)
+        self.back = MessageBatch()
+        if len(self.segments) > self.peak_segments:
+            self.peak_segments = len(self.segments)
+
+    def _refill(self):
+        """ Moves the oldest segment, or the back batch if nothing is on disk, to the front. """
+        if self.segments:
+            batch = self._read_segment(*self.segments.popleft())
+            if not self.segments:
+                self.spill.truncate(0)
+        else:
+            batch, self.back = self.back, MessageBatch()
+        for index in range(len(batch)):
+            self.front.append(batch.load(index, Message(0, 0, 0, 0, False, 0)))
+        if len(self.front) > self.peak_front:
+            self.peak_front = len(self.front)
+        if len(self.front) + len(self.back) > self.peak_in_memory:
+            self.peak_in_memory = len(self.front) + len(self.back)
+
+    def pop(self):
+        """ Removes and returns the message at the front of the queue. """
+        if not self.front:
+            self._refill()
+        message = self.front.popleft()
+        self.depth -= 1
+        self.delivered += 1
+        return message
+
+    def clear(self):
+        """ Discards all pending messages and closes their spill file. Statistics are kept across clears. """
+        if self.spill is not None:
+            self.spill.close()
+        self.front = deque()
+        self.spill = None
+        self.segments = deque()
+        self.back = MessageBatch()
+        self.depth = 0
+
+    def retain(self, keep):
+        """ Discards every pending message for which keep(message) is False, preserving order. """
+        segments = self.segments
+        pending = self._messages(self.front, segments, self.back)
+        self.front, self.segments, self.back = deque(), deque(), MessageBatch()
+        self.depth = 0
+        for message in pending:
+            if keep(message):
+                self.push(message)
+        if not self.segments and self.spill is not None:
+            self.spill.truncate(0)
+
+    def _messages(self, front, segments, back):
+        """ Yields the messages held in the given front, segment files and back batch, in order. """
+        yield from front
+        for offset, count in list(segments):
+            batch = self._read_segment(offset, count)
+            for index in range(count):
+                yield batch.load(index, Message(0, 0, 0, 0, False, 0))
+        for index in range(len(back)):
+            yield back.load(index, Message(0, 0, 0, 0, False, 0))
+
+    def _read_segment(self, offset: int, count: int):
+        """ Reads the segment of `count` messages starting at `offset` in the spill file. """
+        batch = MessageBatch()
+        self.spill.seek(offset)
+        batch.fromfile(self.spill, count)
+        return batch
+
+    def stats(self):
+        """ Returns a dictionary summarizing the scheduler's activity, including spilling. """
+        return {"peak_depth": self.peak_depth, "delivered": self.delivered, "spilled": self.spilled,
+                "peak_segments": self.peak_segments, "peak_in_memory": self.peak_in_memory,
+                "peak_front": self.peak_front, "peak_back": self.peak_back,
+                "peak_spill_bytes": self.peak_spill_bytes}
+
+    def __iter__(self):
+        """ Yields each pending message in delivery order, reading spilled segments back from disk. """
+        return self._messages(self.front, self.segments, self.back)
+
+    def __len__(self):
+        return self.depth
+
+    def __bool__(self):
+        return self.depth > 0
+
+
+class TimedScheduler(object):
+    """
+    Discrete-event message queue ordered by simulated delivery time, backed by a binary heap. A
+    message sent at time `now` arrives `latency` time units later. On a link with a bandwidth,
+    a message must also wait until the messages sent on the link before it have been
+    transmitted, and then takes 1 / bandwidth time units of its own. Each direction of a link
+    transmits independently. Messages arrive in order of arrival time, and in send order when
+    they arrive at the same time. With the same latency on every link and no bandwidth limits,
+    the delivery order is exactly that of the FifoScheduler.
+
+    now: float
+        the simulated time of the last delivered message
+    steps: int
+        the number of distinct delivery times so far
+    peak_depth: int
+        the largest number of messages held at once since creation
+    delivered: int
+        the total number of messages handed out by pop()
+    """
+
+    def __init__(self, latency: dict = None, bandwidth: dict = None, default_latency: float = 1.0,
+                 default_bandwidth: float = None):
+        """
+        latency: dict
+            maps (low ID, high ID) link pairs to their latency, e.g. Topology.latency
+        bandwidth: dict
+            maps (low ID, high ID) link pairs to the messages they carry per time unit
+        default_latency: float
+            the latency of links missing from `latency`
+        default_bandwidth: float
+            the bandwidth of links missing from `bandwidth`; None means unlimited
+        """
+        self.latency = latency if latency is not None else {}
+        self.bandwidth = bandwidth if bandwidth is not None else {}
+        self.default_latency = default_latency
+        self.default_bandwidth = default_bandwidth
+        self.heap = []
+        # Time at which each (origin, destination) direction finishes its current transmissions
+        self.busy = {}
+        self.sequence = 0
+        self.now = 0.0
+        self.steps = 0
+        self.peak_depth = 0
+        self.delivered = 0
+
+    def push(self, message):
+        """ Schedules a message for its arrival time on its link. """
+        link = link_key(message.origin, message.destination)
+        departure = self.now
+        bandwidth = self.bandwidth.get(link, self.default_bandwidth)
+        if bandwidth:
+            direction = (message.origin, message.destination)
+            departure = max(departure, self.busy.get(direction, 0.0)) + 1.0 / bandwidth
+            self.busy[direction] = departure
+        heapq.heappush(self.heap, (departure + self.latency.get(link, self.default_latency), self.sequence, message))
+        self.sequence += 1
+        if len(self.heap) > self.peak_depth:
+            self.peak_depth = len(self.heap)
+
+    def pop(self):
+        """ Removes and returns the next message to arrive, advancing the simulated time to its arrival. """
+        arrival, _, message = heapq.heappop(self.heap)
+        if arrival != self.now or self.steps == 0:
+            self.steps += 1
+        self.now = arrival
+        self.delivered += 1
+        return message
+
+    def clear(self):
+        """ Discards all pending messages, leaving every link idle. Statistics and time are kept. """
+        self.heap = []
+        self.busy = {}
+
+    def retain(self, keep):
+        """ Discards every pending message for which keep(message) is False. Arrival times are kept. """
+        self.heap = [entry for entry in self.heap if keep(entry[2])]
+        heapq.heapify(self.heap)
+
+    def stats(self):
+        """ Returns a dictionary summarizing the scheduler's activity. """
+        return {"peak_depth": self.peak_depth, "delivered": self.delivered, "now": self.now, "steps": self.steps}
+
+    def __iter__(self):
+        return (message for _, _, message in sorted(self.heap, key=lambda entry: entry[:2]))
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __bool__(self):
+        return len(self.heap) > 0
@@ -56,7 +56,7 @@ class StpSwitch(object):
     def verify_neighbors(self):
         """ Verify that all your neighbors have a backlink to you. """
         for neighbor in self.links:
-            if self.switchID not in self.topology.switches[neighbor].links:
+            if self.switchID not in self.topology.adjacency[neighbor]:
                 raise Exception(f"{str(neighbor)} does not have link to {str(self.switchID)}")
 
     # Invoked at initialization of topology of switches, this does NOT need to be invoked by student code.
@@ -66,7 +66,7 @@ class StpSwitch(object):
         """
         for destinationID in self.links:
             self.send_message(
-                Message(self.switchID, 0, self.switchID, destinationID, False, self.topology.ttl_limit)
+                TrustedMessage(self.switchID, 0, self.switchID, destinationID, False, self.topology.ttl_limit)
             )
 
     # Wrapper for message passing to allow students from avoid using self.topology directly
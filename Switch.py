@@ -30,7 +30,7 @@
 # Copyright 2023 Vincent Hu
 #           Based on prior work by Sean Donovan, Jared Scott, James Lohse, and Michael Brown
 
-from Message import Message
+from Message import Message, TrustedMessage
 from StpSwitch import StpSwitch
 
 
@@ -85,6 +85,13 @@ class Switch(StpSwitch):
         # Dictionary and initialization to manage information local to each instance of a switch
         self.switch_information = {}
         self._init_switch_information()
+
+        # Incremented on every change to switch_information, for convergence detection
+        self.state_version = 0
+
+        # Sorted copy of the active links, rebuilt only when state_version has moved on
+        self._sorted_links = []
+        self._sorted_version = 0
         
     def process_message(self, message: Message):
         """
@@ -115,10 +122,12 @@ class Switch(StpSwitch):
         # Handle path through updates (part b - III)
         if message.pathThrough:
             if message.origin not in self.switch_information[self.ACTIVE_LINKS]:
-                self.switch_information[self.ACTIVE_LINKS].append(message.origin)
+                self.switch_information[self.ACTIVE_LINKS].add(message.origin)
+                self.state_version += 1
         elif message.origin != self.switch_information[self.PATH_THROUGH]:
             if message.origin in self.switch_information[self.ACTIVE_LINKS]:
-                self.switch_information[self.ACTIVE_LINKS].remove(message.origin)
+                self.switch_information[self.ACTIVE_LINKS].discard(message.origin)
+                self.state_version += 1
 
         # Decrement TTL AFTER the message has been processed (part c)
         message.ttl -= 1
@@ -153,6 +162,7 @@ class Switch(StpSwitch):
         5. Checks to add message origin to active links if applicable (part b)
         """
         old_path = self.switch_information[self.PATH_THROUGH]
+        self.state_version += 1
         
         self.switch_information[self.ROOT] = message.root
         self.switch_information[self.DISTANCE_TO_ROOT] = message.distance + 1
@@ -160,33 +170,97 @@ class Switch(StpSwitch):
 
         if old_path != self.switchID:  
             if old_path in self.switch_information[self.ACTIVE_LINKS]:
-                self.switch_information[self.ACTIVE_LINKS].remove(old_path)
+                self.switch_information[self.ACTIVE_LINKS].discard(old_path)
         
         if message.origin not in self.switch_information[self.ACTIVE_LINKS]:
-            self.switch_information[self.ACTIVE_LINKS].append(message.origin)
+            self.switch_information[self.ACTIVE_LINKS].add(message.origin)
 
     def _send_messages_to_neighbors(self, message):
         """
-        Method to handle forwarding messages to neighbors of this switch. Does the following:
+        Method to handle forwarding messages to neighbors of this switch. Sends this switch's
+        current view to every neighbor in the links struct with the TTL of the received message.
+        """
+        self.send_bpdus(self.links, message.ttl)
 
-        1. For each neighbor in the links struct
-        2. Evaluate if that neighbor uses us to get to the root or if we use them to get to the root
-        3. Populate and send a new instance of `Message()`
+    def send_bpdus(self, neighbors, ttl: int):
         """
-        for neighbor in self.links:
+        Method to send this switch's current view of the spanning tree to the given neighbors.
+        For each neighbor, evaluate if that neighbor uses us to get to the root or if we use
+        them to get to the root, then populate and send a new instance of `Message()`.
+        """
+        for neighbor in neighbors:
             path_through = (neighbor == self.switch_information[self.PATH_THROUGH] or 
                         self.switchID == self.switch_information[self.PATH_THROUGH])
             
-            new_message = Message(
+            new_message = TrustedMessage(
                 self.switch_information[self.ROOT],
                 self.switch_information[self.DISTANCE_TO_ROOT],
                 self.switchID,
                 neighbor,
                 path_through,
-                message.ttl
+                ttl
             )
             self.send_message(new_message)
 
+    def claimed_path(self):
+        """
+        Returns this switch's current (root, distance_to_root, path_through) claim.
+        """
+        return (self.switch_information[self.ROOT],
+                self.switch_information[self.DISTANCE_TO_ROOT],
+                self.switch_information[self.PATH_THROUGH])
+
+    def forget_links(self, switchIds):
+        """
+        Removes the given switches from this switch's active links, e.g. after they failed.
+        """
+        for switchId in switchIds:
+            if switchId in self.switch_information[self.ACTIVE_LINKS]:
+                self.switch_information[self.ACTIVE_LINKS].discard(switchId)
+                self.state_version += 1
+
+    def restore_state(self, root: int, distance: int, path_through: int, active_links: list,
+                      state_version: int = 0):
+        """
+        Replaces switch_information with a previously saved claim and active links, e.g. when
+        resuming a simulation from a checkpoint.
+        """
+        self.switch_information[self.ROOT] = root
+        self.switch_information[self.DISTANCE_TO_ROOT] = distance
+        self.switch_information[self.PATH_THROUGH] = path_through
+        self.switch_information[self.ACTIVE_LINKS] = set(active_links)
+        self.state_version = state_version
+        self._sorted_version = -1
+
+    def sorted_active_links(self):
+        """
+        Returns the active links in increasing ID order. The sorted list is cached and only
+        rebuilt after the switch's state has changed; callers must not modify it.
+        """
+        if self._sorted_version != self.state_version:
+            self._sorted_links = sorted(self.switch_information[self.ACTIVE_LINKS])
+            self._sorted_version = self.state_version
+        return self._sorted_links
+
+    def is_redundant(self, root: int, distance: int, origin: int, pathThrough: bool):
+        """
+        Returns True if processing a message with these fields would leave switch_information
+        unchanged. Mirrors the decisions made by process_message without applying them.
+        """
+        if root < self.switch_information[self.ROOT]:
+            return False
+        if root == self.switch_information[self.ROOT]:
+            if distance + 1 < self.switch_information[self.DISTANCE_TO_ROOT]:
+                return False
+            if distance + 1 == self.switch_information[self.DISTANCE_TO_ROOT] and \
+                    origin < self.switch_information[self.PATH_THROUGH]:
+                return False
+        if pathThrough:
+            return origin in self.switch_information[self.ACTIVE_LINKS]
+        if origin != self.switch_information[self.PATH_THROUGH]:
+            return origin not in self.switch_information[self.ACTIVE_LINKS]
+        return True
+
     def generate_logstring(self):
         """
         Logs this Switch's list of Active Links in a SORTED order
@@ -208,16 +282,15 @@ class Switch(StpSwitch):
         #
         #      A full example of a valid output file is included (Logs/) in the project skeleton.
 
-        # Get active links and sort them
-        active_links = sorted(self.switch_information[self.ACTIVE_LINKS])
-        
-        # Generate formatted strings for each link
-        link_strings_array = []
-        for link in active_links:
-            link_strings_array.append(f"{self.switchID} - {link}")
-        
-        return ", ".join(link_strings_array) if link_strings_array else f"{self.switchID}"
-    
+        # Active links are only re-sorted when they changed since the last call
+        active_links = self.sorted_active_links()
+        if not active_links:
+            return f"{self.switchID}"
+
+        # Join the neighbor IDs with the separator and this switch's prefix in a single pass
+        prefix = f"{self.switchID} - "
+        return prefix + (", " + prefix).join(map(str, active_links))
+
     def _init_switch_information(self):
         """
         Initialization method to create necessary member variables inside of the switch_information
@@ -226,6 +299,6 @@ class Switch(StpSwitch):
         self.switch_information = {
             self.ROOT: self.switchID, # Initially all switches assume they are the root
             self.DISTANCE_TO_ROOT: 0, # Distance to root node, initially at 0
-            self.ACTIVE_LINKS: [], # Links in the spanning tree, order will be maintained in python arrays
+            self.ACTIVE_LINKS: set(), # Links in the spanning tree, see sorted_active_links for ordered access
             self.PATH_THROUGH: self.switchID, # Which neighbor to go through to reach root (self, since assumed root)
         }
\ No newline at end of file
@@ -0,0 +1,65 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Runs the simulation as a discrete-event simulation in simulated time. The topology's messages
+# go through a TimedScheduler built from the per-link latency and bandwidth of its config (see
+# TopologyLoader.py); the number of distinct arrival times is reported as steps. The run reports
+# when the tree converged in simulated time, the time of the last delivered message and the
+# wall-clock rate at which messages were delivered.
+#
+# With the default latency on every link and no bandwidth limits, messages are delivered in
+# exactly the order of Topology.run_spanning_tree, so the logs are identical.
+
+import time
+
+from Scheduler import TimedScheduler
+
+
+class TimedEngine(object):
+    """
+    converged_at: float
+        the simulated time of the last delivery that changed a switch's state, or of the drops
+    seconds: float
+        the wall-clock duration of the run
+    """
+
+    def __init__(self, topology, default_latency: float = 1.0, default_bandwidth: float = None):
+        """
+        topology: Topology
+            the topology to run; its scheduler is replaced by a TimedScheduler for the run
+        default_latency: float
+            the latency of links without one in the config
+        default_bandwidth: float
+            the bandwidth, in messages per time unit, of links without one; None means unlimited
+        """
+        self.topology = topology
+        self.scheduler = TimedScheduler(topology.latency, topology.bandwidth, default_latency, default_bandwidth)
+        self.converged_at = 0.0
+        self.seconds = 0.0
+
+    def run(self):
+        """ Runs the spanning tree simulation until no message is left. Drops are handled as in Topology. """
+        topology = self.topology
+        scheduler = self.scheduler
+        topology.scheduler = scheduler
+        start = time.perf_counter()
+        topology.restart_topology_messages()
+        # Messages are popped one at a time rather than per arrival time, so that drops discard
+        # the rest of a time step's messages exactly as they would in the FIFO queue
+        while scheduler:
+            msg = scheduler.pop()
+            switch = topology.switches[msg.destination]
+            version = switch.state_version
+            switch.process_message(msg)
+            if switch.state_version != version:
+                self.converged_at = scheduler.now
+            if msg.ttl == 0 and not topology.drop_complete:
+                topology.apply_drops()
+                self.converged_at = scheduler.now
+        self.seconds = time.perf_counter() - start
+
+    def stats(self):
+        """ Returns a dictionary summarizing the run in simulated and wall-clock time. """
+        scheduler = self.scheduler
+        return {"delivered": scheduler.delivered, "steps": scheduler.steps, "peak_depth": scheduler.peak_depth,
+                "converged_at": self.converged_at, "simulated_time": scheduler.now, "seconds": self.seconds,
+                "events_per_second": scheduler.delivered / self.seconds if self.seconds else 0.0}
@@ -33,56 +33,125 @@
 # Copyright 2023 Vincent Hu
 #           Based on prior work by Sean Donovan, Jared Scott, James Lohse, and Michael Brown
 
+import gzip
+
 from Message import *
+from Scheduler import FifoScheduler
 from Switch import Switch
+from TopologyLoader import TopologyConfig, dump_binary, load_config
+
+# Accepted values of the validation argument, see Topology.__init__
+VALIDATION_POLICIES = ("full", "trusted", "sampled", "off")
+# Number of log entries joined into a single write by log_spanning_tree
+LOG_CHUNK = 1 << 14
 
 
 class Topology(object):
 
-    def __init__(self, conf_file: str):
+    def __init__(self, conf_file, scheduler: object = None, incremental_drops: bool = False,
+                 convergence: object = None, validation: str = "full", sample_every: int = 64):
         """This creates all the switches in the Topology from the configuration
         file passed into __init__(). May throw an exception if there is a
         problem with the config file.
+
+        conf_file: str or TopologyConfig
+            a topology module name, a data file path or a config (see TopologyLoader)
+        scheduler: object
+            the queue holding in-flight messages; defaults to a FifoScheduler
+        incremental_drops: bool
+            when True, drops only reset the switches whose path to the root crossed a
+            dropped switch instead of rebuilding and re-flooding the whole topology
+        convergence: ConvergenceDetector
+            when given, stops the simulation as soon as the tree is stable instead of
+            delivering every message until its ttl runs out
+        validation: str
+            how send_message verifies messages: "full" checks every message, "trusted"
+            skips the TrustedMessage objects built by the switches and checks the rest,
+            "sampled" checks one message in every sample_every, and "off" checks none
         """
         self.switches = {}
-        self.messages = []
+        self.scheduler = scheduler if scheduler is not None else FifoScheduler()
         self.dropped_switches = []
         self.ttl_limit = 5 # default
         self.drops = [] # default
         self.drop_complete = False
+        self.incremental_drops = incremental_drops
+        self.convergence = convergence
+        if validation not in VALIDATION_POLICIES:
+            raise ValueError(f"Unknown validation policy: {validation}")
+        self.validation = validation
+        self.sample_every = sample_every
+        self.sent = 0
         self.conf_topo = {}
+        self.adjacency = {}
+        # Per-link latency and bandwidth from the config, used by the TimedScheduler
+        self.latency = {}
+        self.bandwidth = {}
         self.import_conf(conf_file)
 
-    def import_conf(self, conf_file: str):
+    def import_conf(self, conf_file):
+        """Loads the configuration through TopologyLoader. conf_file may be a module name (the
+        original .py configs), a .json, .edges or .stpb file path, or a TopologyConfig.
+        """
         try:
-            conf = __import__(conf_file)
-            if hasattr(conf, "ttl_limit"):
-                self.ttl_limit = conf.ttl_limit
-            if hasattr(conf, "drops"):
-                self.drops = conf.drops
-                self.conf_topo = conf.topo
-            for key in list(conf.topo.keys()):
-                self.switches[key] = Switch(key, self, conf.topo[key])
-            # Verify the topology read from file was correct.
-            for key in list(self.switches.keys()):
-                self.switches[key].verify_neighbors()
+            conf = load_config(conf_file)
+            self.ttl_limit = conf.ttl_limit
+            self.drops = conf.drops
+            self.latency = conf.latency
+            self.bandwidth = conf.bandwidth
+            # The loader hands back fresh lists, which drops are free to mutate
+            self.conf_topo = conf.topo
+            for key in list(self.conf_topo.keys()):
+                self.switches[key] = self.create_switch(key)
+            self._index_links(self.conf_topo)
+            # Verify the topology read from file was correct, unless it comes from the TopologyCache already verified.
+            if not conf.verified:
+                for key in list(self.switches.keys()):
+                    self.switches[key].verify_neighbors()
         except Exception:
             print(f"Error importing conf_file: {conf_file}")
             raise
 
     def send_message(self, message: Message):
-        if not message.verify_message():
-            print("Message is not properly formatted")
-            return
-        if message.destination in self.switches[message.origin].links:
-            self.messages.append(message)
+        validation = self.validation
+        if validation != "off":
+            if validation == "full":
+                checked = True
+            elif validation == "trusted":
+                checked = type(message) is not TrustedMessage
+            else:
+                self.sent += 1
+                checked = self.sent % self.sample_every == 0
+            if checked and not message.verify_message():
+                print("Message is not properly formatted")
+                return
+        if message.destination in self.adjacency.get(message.origin, ()):
+            if self.convergence is None:
+                self.scheduler.push(message)
+            else:
+                self.convergence.push(self, message)
         elif message.origin in self.dropped_switches or message.destination in self.dropped_switches:
             pass
         else:
             print("Messages can only be sent to immediate neighbors")
 
+    def create_switch(self, switchId):
+        """Builds a fresh Switch for switchId from its conf_topo links. Every switch in the
+        topology is created here, which makes it the hook for per-switch instrumentation.
+        """
+        return Switch(switchId, self, self.conf_topo[switchId])
+
+    def _index_links(self, switchIds):
+        """Rebuilds the adjacency index entries of the given switches from conf_topo. The index
+        maps each live switch to a frozenset of its neighbors, so link checks are O(1); it must
+        be refreshed for every switch whose conf_topo list changes.
+        """
+        for switchId in switchIds:
+            if switchId in self.switches:
+                self.adjacency[switchId] = frozenset(self.conf_topo[switchId])
+
     def restart_topology_messages(self):
-        self.messages = []
+        self.scheduler.clear()
         for switch in self.switches:
             self.switches[switch].send_initial_messages()
 
@@ -92,35 +161,235 @@ class Topology(object):
         is delivered to the destination switch, where process_message is invoked.
         """
         self.restart_topology_messages()
+        self.deliver_messages()
+
+    def deliver_messages(self, limit: int = None):
+        """Delivers pending messages, in scheduler order, until none remain. Drops are
+        applied after the first delivered message whose ttl reaches 0. When limit is given,
+        at most that many messages are delivered, so a long run can be paused (see Checkpoint).
+        """
+        scheduler = self.scheduler
+        convergence = self.convergence
+        if convergence is None and limit is None:
+            while scheduler:
+                msg = scheduler.pop()
+                self.switches[msg.destination].process_message(msg)
+                if msg.ttl == 0 and not self.drop_complete:
+                    self.apply_drops()
+            return
 
-        while len(self.messages) > 0:
-            msg = self.messages.pop(0)
-            self.switches[msg.destination].process_message(msg)
+        if convergence is not None:
+            convergence.reset(self)
+        remaining = limit if limit is not None else -1
+        while scheduler and remaining != 0:
+            remaining -= 1
+            msg = scheduler.pop()
+            switch = self.switches[msg.destination]
+            switch.process_message(msg)
+            # The detector sees the delivery before a drop rebuilds the switches; it only stops
+            # the run once the drops are complete
+            if convergence is not None and convergence.observe(self, switch, msg):
+                break
             if msg.ttl == 0 and not self.drop_complete:
-                for switchId in self.drops:
-                    self.drop_switch(switchId)
-                self.drop_complete = True
+                self.apply_drops()
+
+    def apply_drops(self):
+        """Drops every switch listed in the configuration's drops, using the incremental
+        path when it is enabled, and marks the drop phase complete.
+        """
+        if self.incremental_drops:
+            self.drop_switches_incremental(self.drops)
+        else:
+            for switchId in self.drops:
+                self.drop_switch(switchId)
+        self.drop_complete = True
+        if self.convergence is not None:
+            self.convergence.reset(self)
 
     def drop_switch(self, switchId):
         if switchId not in self.dropped_switches:
             for key in self.switches:
                 if switchId in self.conf_topo[key]:
                     self.conf_topo[key].remove(switchId)
-                self.switches[key] = Switch(key, self, self.conf_topo[key])
+                self.switches[key] = self.create_switch(key)
             del self.switches[switchId]
             self.dropped_switches.append(switchId)
+            self._index_links(self.conf_topo[switchId])
+            del self.adjacency[switchId]
             self.restart_topology_messages()
 
+    def drop_switches_incremental(self, switchIds):
+        """Drops the given switches while keeping the learned state of every switch whose
+        path to the root is still intact. A switch is reset if following path_through from
+        it leads to a dropped switch; pending messages the reset switches sent before the
+        drop are discarded as stale, and the reset region is re-announced from its boundary.
+        With a ttl_limit large enough for the network to converge, the resulting tree
+        matches drop_switch.
+        """
+        dropped = [switchId for switchId in switchIds
+                   if switchId in self.switches and switchId not in self.dropped_switches]
+        if not dropped:
+            return
+
+        gone = []
+        for switchId in dropped:
+            self.detach_switch(switchId)
+            for neighbor in self.conf_topo[switchId]:
+                gone.extend(((switchId, neighbor), (neighbor, switchId)))
+        self._reconverge(gone)
+
+    def remove_switch(self, switchId):
+        """Takes a live switch down mid-run, resetting only the switches whose path to the
+        root crossed it (see drop_switches_incremental). It can come back with add_switch.
+        """
+        if switchId not in self.switches:
+            raise ValueError(f"Switch {switchId} is not in the topology")
+        self.drop_switches_incremental([switchId])
+
+    def add_switch(self, switchId, links: list = None):
+        """Brings a switch up mid-run, linked to the given live switches or, by default, to the
+        live switches it was linked to before it was dropped. The new switch announces itself
+        and each neighbor sends it its current claim; no other switch is reset.
+        """
+        if switchId in self.switches:
+            raise ValueError(f"Switch {switchId} is already in the topology")
+        links = self.conf_topo.get(switchId, []) if links is None else links
+        self.conf_topo[switchId] = [link for link in links if link in self.switches]
+        for link in self.conf_topo[switchId]:
+            if switchId not in self.conf_topo[link]:
+                self.conf_topo[link].append(switchId)
+        if switchId in self.dropped_switches:
+            self.dropped_switches.remove(switchId)
+        self.switches[switchId] = self.create_switch(switchId)
+        self._index_links([switchId] + self.conf_topo[switchId])
+        self.switches[switchId].send_initial_messages()
+        for link in self.conf_topo[switchId]:
+            self.switches[link].send_bpdus([switchId], self.ttl_limit)
+
+    def remove_link(self, a, b):
+        """Takes the link between two live switches down mid-run. Pending messages on the link
+        are discarded and only the switches whose path to the root used it are reset.
+        """
+        if b not in self.adjacency.get(a, ()):
+            raise ValueError(f"Switches {a} and {b} are not linked")
+        self.conf_topo[a].remove(b)
+        self.conf_topo[b].remove(a)
+        self._index_links((a, b))
+        self._reconverge([(a, b), (b, a)])
+
+    def add_link(self, a, b):
+        """Brings a link between two live switches up mid-run. Both ends send their current
+        claim across it; no switch is reset, since every existing path stays valid.
+        """
+        if a not in self.switches or b not in self.switches or a == b:
+            raise ValueError(f"Cannot link switches {a} and {b}")
+        if b in self.adjacency[a]:
+            raise ValueError(f"Switches {a} and {b} are already linked")
+        self.conf_topo[a].append(b)
+        self.conf_topo[b].append(a)
+        self._index_links((a, b))
+        self.switches[a].send_bpdus([b], self.ttl_limit)
+        self.switches[b].send_bpdus([a], self.ttl_limit)
+
+    def _reconverge(self, gone):
+        """Handles the (switch, neighbor) links in gone, in both directions, having gone down.
+        Every switch whose path_through chain crossed one of them is reset, the live ends and
+        the live neighbors of the reset switches forget them as active links, pending messages
+        on the gone links or sent by a reset switch are discarded, and the reset region is
+        re-announced from its boundary. The work is proportional to the links of the reset
+        switches, not to the size of the topology or of the queue, when the scheduler can
+        discard messages by link (see FifoScheduler.discard).
+        """
+        switches = self.switches
+        affected = self._find_dependent_switches(gone)
+        for key in affected:
+            switches[key] = self.create_switch(key)
+        for key, neighbor in gone:
+            if key in switches and key not in affected:
+                switches[key].forget_links([neighbor])
+        boundary = set()
+        for key in affected:
+            for neighbor in self.conf_topo[key]:
+                if neighbor not in affected:
+                    switches[neighbor].forget_links([key])
+                    boundary.add(neighbor)
+
+        stale = set(gone)
+        for key in affected:
+            stale.update((key, neighbor) for neighbor in self.conf_topo[key])
+        if hasattr(self.scheduler, "discard"):
+            self.scheduler.discard(stale)
+        else:
+            self.scheduler.retain(lambda message: (message.origin, message.destination) not in stale)
+
+        for key in sorted(affected | boundary):
+            switch = switches[key]
+            if key in affected:
+                switch.send_initial_messages()
+            else:
+                switch.send_bpdus([neighbor for neighbor in switch.links if neighbor in affected], self.ttl_limit)
+
+    def detach_switch(self, switchId):
+        """Removes a switch and its links from the topology and records it as dropped, without
+        touching the state of any other switch or the pending messages.
+        """
+        # Switch.links shares its list with conf_topo, so this also unlinks the neighbor
+        for neighbor in self.conf_topo[switchId]:
+            if switchId in self.conf_topo[neighbor]:
+                self.conf_topo[neighbor].remove(switchId)
+        del self.switches[switchId]
+        self.dropped_switches.append(switchId)
+        self._index_links(self.conf_topo[switchId])
+        del self.adjacency[switchId]
+
+    def _find_dependent_switches(self, gone):
+        """Returns the set of live switches whose path_through is the far end of one of the
+        (switch, neighbor) links in gone, together with every switch whose path_through chain
+        leads to one of them.
+        """
+        switches = self.switches
+        frontier = [key for key, neighbor in gone
+                    if key in switches and switches[key].claimed_path()[2] == neighbor]
+        affected = set(frontier)
+        while frontier:
+            key = frontier.pop()
+            for neighbor in switches[key].links:
+                if neighbor not in affected and switches[neighbor].claimed_path()[2] == key:
+                    affected.add(neighbor)
+                    frontier.append(neighbor)
+        return affected
+
     def log_spanning_tree(self, filename: str):
         """This function drives the logging of the text file representing the spanning tree.
         It is invoked at the end of the simulation, and iterates through the switches in
         increasing order of ID and invokes the generate_logstring function.  That string
         is written to the file as provided by the student code.
+
+        Lines are joined and written LOG_CHUNK switches at a time. A filename ending in .gz is
+        written as gzip-compressed text, and one ending in .stpb as the binary adjacency format
+        of TopologyLoader, mapping each switch to its active links.
         """
-        with open(filename, 'w') as out:
-            for switch in sorted(self.switches.keys()):
-                entry = self.switches[switch].generate_logstring()
-                if switch not in self.dropped_switches:
-                    entry += "\n"
-                out.write(entry)
-            out.close()
+        if filename.endswith(".stpb"):
+            tree = {}
+            for switchId in sorted(self.switches):
+                switch = self.switches[switchId]
+                tree[switchId] = switch.sorted_active_links()
+            dump_binary(TopologyConfig(tree, self.ttl_limit), filename)
+            return
+
+        opener = gzip.open if filename.endswith(".gz") else open
+        with opener(filename, 'wt') as out:
+            for text in self.log_chunks():
+                out.write(text)
+
+    def log_chunks(self):
+        """Yields the text log written by log_spanning_tree, LOG_CHUNK switches at a time."""
+        chunk = []
+        for switch in sorted(self.switches):
+            chunk.append(self.switches[switch].generate_logstring())
+            if switch not in self.dropped_switches:
+                chunk.append("\n")
+            if len(chunk) >= LOG_CHUNK:
+                yield "".join(chunk)
+                chunk = []
+        yield "".join(chunk)
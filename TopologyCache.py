@@ -0,0 +1,144 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# On-disk cache of compiled topologies. A topology is compiled once: loaded through TopologyLoader,
+# checked link by link for backlinks (what Switch.verify_neighbors does), and written in the
+# binary adjacency format. Later loads of the same config memory-map the compiled file (see
+# TopologyLoader.map_binary) and hand Topology a config marked as verified, so no parsing, module
+# import or neighbor verification is repeated.
+#
+# Entries are keyed by a SHA-256 digest of the config's content: the bytes of the config file
+# (for a module name, the file it would be imported from), or the topo, ttl_limit, drops and link
+# models of a TopologyConfig. Hashing the source instead of the parsed config is what lets a hit
+# skip the parse; a Python module whose topo depends on anything other than its own file should
+# not be cached. The cache is bounded by total size on disk and evicts the least recently used
+# entries, tracked through each file's modification time.
+
+import hashlib
+import importlib.util
+import math
+import os
+import sys
+from array import array
+
+from CacheFiles import evict_lru, write_atomic
+from TopologyLoader import TopologyConfig, dump_binary, load_config, map_binary
+
+# Bumped whenever the compiled format or the validation changes, so stale entries are never hit
+CACHE_VERSION = 2
+CACHE_EXTENSION = ".stpb"
+# Bytes read per chunk when hashing a config file
+HASH_CHUNK = 1 << 20
+
+
+def source_path(conf_file: str):
+    """ Returns the file a config is loaded from: the path itself, or the file a module name imports. """
+    if os.path.isfile(conf_file):
+        return conf_file
+    spec = importlib.util.find_spec(conf_file)
+    if spec is None or spec.origin is None or not os.path.isfile(spec.origin):
+        raise ValueError(f"Cannot find the source of topology {conf_file}")
+    return spec.origin
+
+
+def config_digest(conf_file):
+    """ Returns the hex SHA-256 cache key of a config file, module name or TopologyConfig. """
+    digest = hashlib.sha256(f"stp-topology-cache {CACHE_VERSION}\n".encode())
+    if isinstance(conf_file, TopologyConfig):
+        values = array("q", (conf_file.ttl_limit, len(conf_file.topo), len(conf_file.drops)))
+        for key, links in conf_file.topo.items():
+            values.extend((key, len(links)))
+            values.extend(links)
+        values.extend(conf_file.drops)
+        models = sorted(set(conf_file.latency) | set(conf_file.bandwidth))
+        for link in models:
+            values.extend(link)
+        rates = array("d", (model.get(link, math.nan) for model in (conf_file.latency, conf_file.bandwidth)
+                            for link in models))
+        if sys.byteorder == "big":
+            values.byteswap()
+            rates.byteswap()
+        digest.update(b"config\n")
+        digest.update(values.tobytes())
+        digest.update(rates.tobytes())
+        return digest.hexdigest()
+
+    path = source_path(conf_file)
+    # The extension selects the parser, so the same bytes under another extension are another config
+    digest.update(os.path.splitext(path)[1].lower().encode() + b"\n")
+    with open(path, "rb") as infile:
+        for chunk in iter(lambda: infile.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_config(config: TopologyConfig):
+    """ Raises an Exception unless every link of the config has a backlink, as Switch.verify_neighbors does. """
+    topo = config.topo
+    adjacency = {key: frozenset(links) for key, links in topo.items()}
+    for key, links in topo.items():
+        for neighbor in links:
+            if key not in adjacency.get(neighbor, ()):
+                raise Exception(f"{str(neighbor)} does not have link to {str(key)}")
+
+
+class TopologyCache(object):
+    """
+    hits: int
+        the number of loads served from a compiled file
+    misses: int
+        the number of loads that compiled the config
+    evicted: int
+        the number of compiled files removed to stay within max_bytes
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        """
+        directory: str
+            where the compiled files are kept; created if missing
+        max_bytes: int
+            the total size of compiled files kept on disk
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str):
+        """ Returns the path of the compiled file for a cache key. """
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def load(self, conf_file):
+        """
+        Returns a verified TopologyConfig for conf_file (anything load_config accepts), compiling
+        and caching it on a miss. The config can be passed straight to Topology.
+        """
+        key = config_digest(conf_file)
+        path = self.path(key)
+        try:
+            config = map_binary(path)
+        except (FileNotFoundError, ValueError):
+            # Missing, or cut short by a writer that died; compile it again
+            config = None
+        if config is not None:
+            self.hits += 1
+            os.utime(path)
+            config.verified = True
+            return config
+
+        self.misses += 1
+        config = load_config(conf_file)
+        verify_config(config)
+        config.verified = True
+        write_atomic(path, lambda temporary: dump_binary(config, temporary))
+        self.evict(keep=path)
+        return config
+
+    def evict(self, keep: str = None):
+        """ Removes the least recently used compiled files until the cache fits in max_bytes. """
+        self.evicted += evict_lru(self.directory, CACHE_EXTENSION, self.max_bytes, keep)
+
+    def stats(self):
+        """ Returns a dictionary summarizing the cache's activity. """
+        return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted}
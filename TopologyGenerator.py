@@ -0,0 +1,213 @@
+#!/usr/bin/python
+
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Generates large synthetic topologies: fat-trees, grids and tori, random regular graphs,
+# Jellyfish-style random graphs and scale-free (Barabasi-Albert) graphs. Every generator returns a
+# TopologyConfig with switch IDs numbered from 1; random families are reproducible from their seed.
+#
+# Usage:
+#     python TopologyGenerator.py <family> --size N [--ttl-limit T] [--drops D] [--seed S] -o <file>
+# The output format follows the file extension (.json, .edges or .stpb, see TopologyLoader.py).
+
+import argparse
+import math
+import random
+
+from TopologyLoader import TopologyConfig, dump_binary, dump_edge_list, dump_json
+
+
+def _empty(count: int):
+    return {switchId: [] for switchId in range(1, count + 1)}
+
+
+def _link(topo: dict, a: int, b: int):
+    topo[a].append(b)
+    topo[b].append(a)
+
+
+def fat_tree(k: int):
+    """
+    Returns the switch graph of a k-ary fat-tree (k even): (k/2)^2 core switches, then k pods of
+    k/2 aggregation and k/2 edge switches each. Hosts are not modeled.
+    """
+    if k < 2 or k % 2:
+        raise ValueError("fat-tree arity k must be an even number >= 2")
+    half = k // 2
+    core_count = half * half
+    topo = _empty(core_count + k * k)
+    for pod in range(k):
+        aggregation = [core_count + pod * k + i + 1 for i in range(half)]
+        edge = [core_count + pod * k + half + i + 1 for i in range(half)]
+        for i, agg in enumerate(aggregation):
+            for j in range(half):
+                _link(topo, agg, i * half + j + 1)
+            for switchId in edge:
+                _link(topo, agg, switchId)
+    return topo
+
+
+def grid(width: int, height: int, torus: bool = False):
+    """ Returns a width x height grid; with torus set, rows and columns wrap around. """
+    topo = _empty(width * height)
+    for row in range(height):
+        for column in range(width):
+            switchId = row * width + column + 1
+            if column + 1 < width or (torus and width > 2):
+                _link(topo, switchId, row * width + (column + 1) % width + 1)
+            if row + 1 < height or (torus and height > 2):
+                _link(topo, switchId, ((row + 1) % height) * width + column + 1)
+    return topo
+
+
+def _join_random_ports(topo: dict, ports: int, rng, links: set):
+    """
+    Gives every switch `ports` free ports and links random pairs of free ports on distinct,
+    not yet linked switches until no such pair is left. Returns the switches that still have
+    free ports, one entry per free port.
+    """
+    points = [switchId for switchId in topo for _ in range(ports)]
+    failures = 0
+    while len(points) > 1:
+        i, j = rng.randrange(len(points)), rng.randrange(len(points))
+        a, b = points[i], points[j]
+        if a == b or (min(a, b), max(a, b)) in links:
+            failures += 1
+            # After many misses, stop if no usable pair remains among the leftover switches
+            if failures > 100 and not _has_free_pair(set(points), links):
+                break
+            continue
+        failures = 0
+        links.add((min(a, b), max(a, b)))
+        _link(topo, a, b)
+        for index in sorted((i, j), reverse=True):
+            points[index] = points[-1]
+            points.pop()
+    return points
+
+
+def _has_free_pair(switches: set, links: set):
+    """ Returns True if two of the given switches are not linked to each other yet. """
+    ordered = sorted(switches)
+    return any((a, b) not in links for i, a in enumerate(ordered) for b in ordered[i + 1:])
+
+
+def random_regular(count: int, degree: int, seed: int = 0):
+    """
+    Returns a random degree-regular graph, built by linking random pairs of free ports and
+    starting over in the rare case that the last ports cannot be paired.
+    """
+    if count * degree % 2 or degree >= count:
+        raise ValueError("random regular graphs need count * degree even and degree < count")
+    rng = random.Random(seed)
+    while True:
+        topo = _empty(count)
+        if not _join_random_ports(topo, degree, rng, set()):
+            return topo
+
+
+def jellyfish(count: int, ports: int, seed: int = 0):
+    """
+    Returns a Jellyfish topology: switches with `ports` switch-facing ports are joined at random
+    until no two switches with free ports remain unlinked. A switch left with two or more free
+    ports then splices itself into a random existing link, as in the original construction.
+    """
+    rng = random.Random(seed)
+    topo = _empty(count)
+    links = set()
+    leftover = _join_random_ports(topo, ports, rng, links)
+
+    for switchId in sorted(set(leftover)):
+        free = leftover.count(switchId)
+        candidates = sorted(links)
+        while free >= 2 and candidates:
+            a, b = candidates.pop(rng.randrange(len(candidates)))
+            if switchId in (a, b) or (min(a, switchId), max(a, switchId)) in links or \
+                    (min(b, switchId), max(b, switchId)) in links or (a, b) not in links:
+                continue
+            links.discard((a, b))
+            topo[a].remove(b)
+            topo[b].remove(a)
+            for other in (a, b):
+                links.add((min(other, switchId), max(other, switchId)))
+                _link(topo, other, switchId)
+            free -= 2
+    return topo
+
+
+def scale_free(count: int, attachments: int = 2, seed: int = 0):
+    """
+    Returns a Barabasi-Albert scale-free graph: starting from a clique of attachments + 1
+    switches, each new switch links to `attachments` existing switches chosen with probability
+    proportional to their degree.
+    """
+    rng = random.Random(seed)
+    topo = _empty(count)
+    seed_size = min(count, attachments + 1)
+    endpoints = []
+    for a in range(1, seed_size + 1):
+        for b in range(a + 1, seed_size + 1):
+            _link(topo, a, b)
+            endpoints.extend((a, b))
+    for switchId in range(seed_size + 1, count + 1):
+        targets = set()
+        while len(targets) < attachments:
+            targets.add(rng.choice(endpoints))
+        for target in sorted(targets):
+            _link(topo, switchId, target)
+            endpoints.extend((switchId, target))
+    return topo
+
+
+FAMILIES = ("fat_tree", "grid", "torus", "random_regular", "jellyfish", "scale_free")
+
+
+def generate(family: str, size: int, ttl_limit: int = 5, drops: int = 0, seed: int = 0, degree: int = 4):
+    """
+    Returns a TopologyConfig of the given family with roughly `size` switches, `drops` switches
+    chosen at random to be dropped, and the given ttl_limit. degree sets the port count of the
+    random regular and Jellyfish families and the attachment count of scale-free graphs (halved).
+    """
+    if family == "fat_tree":
+        # A k-ary fat-tree has 5k^2/4 switches; pick the smallest even k that reaches size
+        k = max(2, 2 * math.ceil(math.sqrt(size / 5.0)))
+        topo = fat_tree(k)
+    elif family in ("grid", "torus"):
+        width = max(1, round(math.sqrt(size)))
+        topo = grid(width, max(1, math.ceil(size / width)), torus=family == "torus")
+    elif family == "random_regular":
+        topo = random_regular(size + (size * degree) % 2, degree, seed)
+    elif family == "jellyfish":
+        topo = jellyfish(size, degree, seed)
+    elif family == "scale_free":
+        topo = scale_free(size, max(1, degree // 2), seed)
+    else:
+        raise ValueError(f"unknown topology family: {family}")
+    dropped = random.Random(seed + 1).sample(sorted(topo), min(drops, len(topo)))
+    return TopologyConfig(topo, ttl_limit, dropped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic topology generator")
+    parser.add_argument("family", choices=FAMILIES)
+    parser.add_argument("--size", type=int, required=True, help="approximate number of switches")
+    parser.add_argument("--degree", type=int, default=4, help="ports per switch for random families")
+    parser.add_argument("--ttl-limit", type=int, default=5)
+    parser.add_argument("--drops", type=int, default=0, help="number of random switches to drop")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", required=True, help="output file (.json, .edges or .stpb)")
+    args = parser.parse_args()
+
+    config = generate(args.family, args.size, args.ttl_limit, args.drops, args.seed, args.degree)
+    if args.output.endswith(".json"):
+        dump_json(config, args.output)
+    elif args.output.endswith(".edges"):
+        dump_edge_list(config, args.output)
+    elif args.output.endswith(".stpb"):
+        dump_binary(config, args.output)
+    else:
+        parser.error("output must end in .json, .edges or .stpb")
+
+
+if __name__ == "__main__":
+    main()
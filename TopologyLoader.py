@@ -0,0 +1,332 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Loads topology configurations. Besides the original Python modules (topo, ttl_limit and drops
+# defined as module globals), three data-only formats are supported that never execute code:
+#
+#   JSON (.json)       {"ttl_limit": 6, "drops": [3, 7], "topo": {"1": [2, 5], "2": [1], ...}}
+#   Edge list (.edges) one "a b" pair per line for each link, plus optional "ttl_limit N",
+#                      "drops A B ..." and "switch A" (a switch with no links) lines; '#' starts
+#                      a comment. Each switch's neighbors keep the order in which they appear.
+#   Binary (.stpb)     little-endian header and int64 arrays: switch IDs, per-switch degrees,
+#                      the concatenated neighbor lists and the drops.
+#
+# The edge-list and binary formats are parsed as a stream, without materializing the whole file.
+#
+# A config may also give links a latency (simulated time units) and a bandwidth (messages per
+# time unit), used by the TimedScheduler; links without one use the scheduler's defaults. Python
+# modules define latency and bandwidth dicts keyed by (a, b) pairs, JSON files "latency" and
+# "bandwidth" lists of [a, b, value] triples, and edge lists a third (latency) and fourth
+# (bandwidth, "-" for none) column on a link's line. Binary files that carry link models are
+# written as version 2, which appends the model count, the (a, b) pairs and the latency and
+# bandwidth as float64 arrays, NaN where a link has none.
+
+import importlib.util
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+DEFAULT_TTL_LIMIT = 5
+
+BINARY_MAGIC = b"STPB"
+BINARY_VERSION = 1
+# Version written when the config has link models
+BINARY_LINK_VERSION = 2
+# magic, version, ttl_limit, switch count, adjacency entry count, drop count
+BINARY_HEADER = struct.Struct("<4sBqqqq")
+# Number of int64 values read per chunk when streaming binary arrays
+BINARY_CHUNK = 1 << 16
+
+
+class TopologyConfig(object):
+
+    def __init__(self, topo: dict, ttl_limit: int = DEFAULT_TTL_LIMIT, drops: list = None,
+                 verified: bool = False, latency: dict = None, bandwidth: dict = None):
+        """
+        topo: dict
+            maps every switch ID to the list of switch IDs it links to
+        ttl_limit: int
+            the ttl given to the initial messages of every switch
+        drops: list
+            the switch IDs to drop once the first message's ttl runs out
+        verified: bool
+            True when every link is already known to have a backlink (see TopologyCache.py),
+            so Topology can skip verify_neighbors
+        latency: dict
+            maps (low ID, high ID) link pairs to their latency in simulated time units
+        bandwidth: dict
+            maps (low ID, high ID) link pairs to the messages they carry per simulated time unit
+        """
+        self.topo = topo
+        self.ttl_limit = ttl_limit
+        self.drops = drops if drops is not None else []
+        self.verified = verified
+        self.latency = latency if latency is not None else {}
+        self.bandwidth = bandwidth if bandwidth is not None else {}
+
+    def copy(self):
+        """ Returns a copy whose adjacency lists can be mutated without affecting this config. """
+        return TopologyConfig({key: list(links) for key, links in self.topo.items()},
+                              self.ttl_limit, list(self.drops), self.verified, dict(self.latency),
+                              dict(self.bandwidth))
+
+
+def link_key(a: int, b: int):
+    """ Returns the key of the link between a and b in the latency and bandwidth dicts. """
+    return (a, b) if a < b else (b, a)
+
+
+def _link_values(values):
+    """ Returns a latency or bandwidth dict from (a, b, value) triples. """
+    return {link_key(int(a), int(b)): float(value) for a, b, value in values}
+
+
+def load_config(conf_file):
+    """
+    Returns a TopologyConfig for conf_file, which may be a TopologyConfig (copied), a path to
+    a .json, .edges or .stpb file, a path to a .py file, or the name of an importable module.
+    """
+    if isinstance(conf_file, TopologyConfig):
+        return conf_file.copy()
+    extension = os.path.splitext(conf_file)[1].lower()
+    if extension == ".json":
+        return load_json(conf_file)
+    if extension == ".edges":
+        return load_edge_list(conf_file)
+    if extension == ".stpb":
+        return load_binary(conf_file)
+    return load_module(conf_file)
+
+
+def load_module(conf_file: str):
+    """ Loads a Python topology module, given either its file path or its module name. """
+    if conf_file.endswith(".py"):
+        spec = importlib.util.spec_from_file_location(os.path.basename(conf_file)[:-3], conf_file)
+    else:
+        spec = importlib.util.find_spec(conf_file)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{conf_file}'", name=conf_file)
+    # Executed without registering it in sys.modules, so every load reads the file as it is now
+    conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(conf)
+    return TopologyConfig({key: list(links) for key, links in conf.topo.items()},
+                          getattr(conf, "ttl_limit", DEFAULT_TTL_LIMIT),
+                          list(getattr(conf, "drops", [])),
+                          latency=_link_values((a, b, value) for (a, b), value in getattr(conf, "latency", {}).items()),
+                          bandwidth=_link_values((a, b, value) for (a, b), value in getattr(conf, "bandwidth", {}).items()))
+
+
+def load_json(path: str):
+    """ Loads a JSON topology. Switch IDs given as object keys are converted back to ints. """
+    with open(path) as infile:
+        data = json.load(infile)
+    topo = {int(key): [int(link) for link in links] for key, links in data["topo"].items()}
+    return TopologyConfig(topo, int(data.get("ttl_limit", DEFAULT_TTL_LIMIT)),
+                          [int(switchId) for switchId in data.get("drops", [])],
+                          latency=_link_values(data.get("latency", [])),
+                          bandwidth=_link_values(data.get("bandwidth", [])))
+
+
+def load_edge_list(path: str):
+    """ Loads an edge-list topology line by line. """
+    topo = {}
+    config = TopologyConfig(topo)
+    with open(path) as infile:
+        for number, line in enumerate(infile, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            if fields[0] == "ttl_limit" and len(fields) == 2:
+                config.ttl_limit = int(fields[1])
+            elif fields[0] == "drops":
+                config.drops.extend(int(field) for field in fields[1:])
+            elif fields[0] == "switch" and len(fields) == 2:
+                topo.setdefault(int(fields[1]), [])
+            elif 2 <= len(fields) <= 4:
+                a, b = int(fields[0]), int(fields[1])
+                topo.setdefault(a, []).append(b)
+                topo.setdefault(b, []).append(a)
+                if len(fields) >= 3 and fields[2] != "-":
+                    config.latency[link_key(a, b)] = float(fields[2])
+                if len(fields) == 4 and fields[3] != "-":
+                    config.bandwidth[link_key(a, b)] = float(fields[3])
+            else:
+                raise ValueError(f"{path}:{number}: cannot parse line: {line.strip()}")
+    return config
+
+
+def _read_int64(infile, count: int):
+    """ Streams `count` little-endian int64 values from infile in fixed-size chunks. """
+    while count > 0:
+        chunk = array("q")
+        size = min(count, BINARY_CHUNK)
+        chunk.fromfile(infile, size)
+        if sys.byteorder == "big":
+            chunk.byteswap()
+        yield from chunk
+        count -= size
+
+
+def _check_binary(path: str, magic: bytes, version: int):
+    if magic != BINARY_MAGIC or version not in (BINARY_VERSION, BINARY_LINK_VERSION):
+        raise ValueError(f"{path} is not a version {BINARY_VERSION} or {BINARY_LINK_VERSION} binary topology")
+
+
+def _link_models(config: TopologyConfig, pairs: list, latency: array, bandwidth: array):
+    """ Fills a config's latency and bandwidth dicts from the link model arrays of a binary file. """
+    for index, value in enumerate(latency):
+        if not math.isnan(value):
+            config.latency[(pairs[2 * index], pairs[2 * index + 1])] = value
+    for index, value in enumerate(bandwidth):
+        if not math.isnan(value):
+            config.bandwidth[(pairs[2 * index], pairs[2 * index + 1])] = value
+
+
+def _read_float64(infile, count: int):
+    """ Reads `count` little-endian float64 values from infile. """
+    values = array("d")
+    values.fromfile(infile, count)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def load_binary(path: str):
+    """ Loads a binary adjacency topology written by dump_binary. Raises ValueError if it is cut short. """
+    with open(path, "rb") as infile:
+        try:
+            magic, version, ttl_limit, switch_count, link_count, drop_count = \
+                BINARY_HEADER.unpack(infile.read(BINARY_HEADER.size))
+            _check_binary(path, magic, version)
+            ids = list(_read_int64(infile, switch_count))
+            degrees = list(_read_int64(infile, switch_count))
+            neighbors = _read_int64(infile, link_count)
+            topo = {}
+            for switchId, degree in zip(ids, degrees):
+                topo[switchId] = [next(neighbors) for _ in range(degree)]
+            drops = list(_read_int64(infile, drop_count))
+            config = TopologyConfig(topo, ttl_limit, drops)
+            if version == BINARY_LINK_VERSION:
+                model_count = next(_read_int64(infile, 1))
+                pairs = list(_read_int64(infile, 2 * model_count))
+                _link_models(config, pairs, _read_float64(infile, model_count), _read_float64(infile, model_count))
+        except (struct.error, EOFError, StopIteration):
+            raise ValueError(f"{path} is truncated")
+    return config
+
+
+def map_binary(path: str):
+    """
+    Loads a binary adjacency topology through a read-only memory map, slicing every switch's
+    neighbor list straight out of the mapped array. Falls back to load_binary on big-endian hosts.
+    Raises ValueError if the file is cut short or its counts do not add up.
+    """
+    if sys.byteorder == "big":
+        return load_binary(path)
+    with open(path, "rb") as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if len(data) < BINARY_HEADER.size or (len(data) - BINARY_HEADER.size) % 8:
+            raise ValueError(f"{path} is truncated")
+        magic, version, ttl_limit, switch_count, link_count, drop_count = BINARY_HEADER.unpack_from(data)
+        _check_binary(path, magic, version)
+        values = memoryview(data)[BINARY_HEADER.size:].cast("q")
+        try:
+            # Slices past the end would silently come back short, so every count is checked first
+            size = 2 * switch_count + link_count + drop_count
+            if min(switch_count, link_count, drop_count) < 0 or len(values) < size + (version == BINARY_LINK_VERSION):
+                raise ValueError(f"{path} is truncated")
+            if version == BINARY_LINK_VERSION:
+                model_count = values[size]
+                size += 1 + 4 * max(model_count, -1)
+            if len(values) != size:
+                raise ValueError(f"{path} is truncated")
+            ids = values[:switch_count].tolist()
+            degrees = values[switch_count:2 * switch_count].tolist()
+            if sum(degrees) != link_count or min(degrees, default=0) < 0:
+                raise ValueError(f"{path} has inconsistent link counts")
+            neighbors = values[2 * switch_count:2 * switch_count + link_count]
+            topo = {}
+            start = 0
+            for switchId, degree in zip(ids, degrees):
+                topo[switchId] = neighbors[start:start + degree].tolist()
+                start += degree
+            start = 2 * switch_count + link_count
+            drops = values[start:start + drop_count].tolist()
+            config = TopologyConfig(topo, ttl_limit, drops)
+            if version == BINARY_LINK_VERSION:
+                start += drop_count
+                pairs = values[start + 1:start + 1 + 2 * model_count].tolist()
+                start += 1 + 2 * model_count
+                models = array("d", values[start:start + 2 * model_count].tobytes())
+                _link_models(config, pairs, models[:model_count], models[model_count:])
+        finally:
+            # The map cannot close while views into it are alive
+            neighbors = None
+            values.release()
+    return config
+
+
+def dump_json(config: TopologyConfig, path: str):
+    """ Writes a config in the JSON format. """
+    data = {"ttl_limit": config.ttl_limit, "drops": config.drops,
+            "topo": {str(key): links for key, links in config.topo.items()}}
+    if config.latency:
+        data["latency"] = [[a, b, value] for (a, b), value in config.latency.items()]
+    if config.bandwidth:
+        data["bandwidth"] = [[a, b, value] for (a, b), value in config.bandwidth.items()]
+    with open(path, "w") as out:
+        json.dump(data, out)
+
+
+def dump_edge_list(config: TopologyConfig, path: str):
+    """
+    Writes a config in the edge-list format, one line per link. Reloading gives the same links,
+    though a switch's neighbors may come back in a different order.
+    """
+    with open(path, "w") as out:
+        out.write(f"ttl_limit {config.ttl_limit}\n")
+        if config.drops:
+            out.write("drops " + " ".join(str(switchId) for switchId in config.drops) + "\n")
+        written = set()
+        for key, links in config.topo.items():
+            if not links:
+                out.write(f"switch {key}\n")
+            for link in links:
+                if (link, key) not in written:
+                    written.add((key, link))
+                    out.write(f"{key} {link}{_link_columns(config, key, link)}\n")
+
+
+def _link_columns(config: TopologyConfig, a: int, b: int):
+    """ Returns the latency and bandwidth columns of a link's edge-list line, if it has a model. """
+    latency = config.latency.get(link_key(a, b))
+    bandwidth = config.bandwidth.get(link_key(a, b))
+    if bandwidth is not None:
+        return f" {'-' if latency is None else latency} {bandwidth}"
+    return "" if latency is None else f" {latency}"
+
+
+def dump_binary(config: TopologyConfig, path: str):
+    """ Writes a config in the binary adjacency format. """
+    ids = array("q", config.topo.keys())
+    degrees = array("q", (len(links) for links in config.topo.values()))
+    neighbors = array("q")
+    for links in config.topo.values():
+        neighbors.extend(links)
+    drops = array("q", config.drops)
+    arrays = [ids, degrees, neighbors, drops]
+    models = sorted(set(config.latency) | set(config.bandwidth))
+    if models:
+        arrays.append(array("q", [len(models)]))
+        arrays.append(array("q", (switchId for link in models for switchId in link)))
+        arrays.append(array("d", (config.latency.get(link, math.nan) for link in models)))
+        arrays.append(array("d", (config.bandwidth.get(link, math.nan) for link in models)))
+    with open(path, "wb") as out:
+        out.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_LINK_VERSION if models else BINARY_VERSION,
+                                     config.ttl_limit, len(ids), len(neighbors), len(drops)))
+        for values in arrays:
+            if sys.byteorder == "big":
+                values.byteswap()
+            values.tofile(out)
@@ -0,0 +1,181 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Opt-in message tracing and replay. A TraceRecorder attached to a Topology appends every message
+# it delivers, in delivery order, to a trace file, and every keyframe_interval deliveries saves the
+# full simulation state as a checkpoint (see Checkpoint.py). replay() rebuilds the state after any
+# number of deliveries by loading the nearest earlier keyframe and re-delivering only the traced
+# messages that follow it.
+#
+# Trace (.stpt) files are a little-endian header followed by fixed-width records of six int64
+# values (root, distance, origin, destination, pathThrough, ttl as delivered), so record i starts
+# at a known offset and the file can be memory-mapped. Keyframes are written next to the trace as
+# <trace>.keyframes/<delivery count>.stpc.
+#
+# Usage:
+#     python Trace.py <trace_file> <index> [--log <logfile>] [--messages N]
+# Tracing follows Topology.deliver_messages, so it applies to the fifo engine only.
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from Checkpoint import load_checkpoint, save_checkpoint
+from Message import Message
+
+TRACE_MAGIC = b"STPT"
+TRACE_VERSION = 1
+# magic, version, incremental drops, keyframe interval
+TRACE_HEADER = struct.Struct("<4sBBq")
+TRACE_RECORD = struct.Struct("<qqqqqq")
+# Number of records buffered before they are appended to the file
+TRACE_BUFFER = 1 << 14
+
+
+def keyframe_dir(path: str):
+    """ Returns the directory holding the keyframes of a trace file. """
+    return path + ".keyframes"
+
+
+class TraceRecorder(object):
+    """
+    delivered: int
+        the number of messages recorded so far
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = 100000):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.delivered = 0
+        self.buffer = array("q")
+        self.out = None
+
+    def attach(self, topology):
+        """
+        Starts a new trace and wraps the pop method of the topology's scheduler, so each
+        delivered message is recorded as it leaves the queue.
+        """
+        # Keyframes left by an earlier trace at the same path would not match this run
+        directory = keyframe_dir(self.path)
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".stpc"):
+                os.remove(os.path.join(directory, name))
+        self.out = open(self.path, "wb")
+        self.out.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, topology.incremental_drops,
+                                         self.keyframe_interval))
+        scheduler = topology.scheduler
+        pop = scheduler.pop
+
+        def recording_pop():
+            if self.delivered % self.keyframe_interval == 0:
+                save_checkpoint(topology, os.path.join(keyframe_dir(self.path), f"{self.delivered}.stpc"))
+            message = pop()
+            self.buffer.extend((message.root, message.distance, message.origin, message.destination,
+                                message.pathThrough, message.ttl))
+            self.delivered += 1
+            if len(self.buffer) >= TRACE_BUFFER * 6:
+                self.flush()
+            return message
+
+        scheduler.pop = recording_pop
+        return self
+
+    def flush(self):
+        """ Appends the buffered records to the trace file. """
+        if sys.byteorder == "big":
+            self.buffer.byteswap()
+        self.buffer.tofile(self.out)
+        self.buffer = array("q")
+        self.out.flush()
+
+    def close(self):
+        """ Writes the remaining records and closes the trace file. """
+        self.flush()
+        self.out.close()
+
+
+class TraceReader(object):
+    """
+    Random access to the records of a trace file through a read-only memory map.
+
+    incremental_drops: bool
+        whether the traced topology used incremental drops
+    keyframe_interval: int
+        the number of deliveries between keyframes
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as infile:
+            magic, version, incremental_drops, self.keyframe_interval = \
+                TRACE_HEADER.unpack(infile.read(TRACE_HEADER.size))
+            if magic != TRACE_MAGIC or version != TRACE_VERSION:
+                raise ValueError(f"{path} is not a version {TRACE_VERSION} trace")
+            self.incremental_drops = bool(incremental_drops)
+            size = os.fstat(infile.fileno()).st_size
+            self.count = (size - TRACE_HEADER.size) // TRACE_RECORD.size
+            self.data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b""
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index: int):
+        """ Returns the index-th delivered message as a new Message object. """
+        if not 0 <= index < self.count:
+            raise IndexError(f"trace record {index} out of range")
+        root, distance, origin, destination, pathThrough, ttl = \
+            TRACE_RECORD.unpack_from(self.data, TRACE_HEADER.size + index * TRACE_RECORD.size)
+        return Message(root, distance, origin, destination, pathThrough == 1, ttl)
+
+    def keyframes(self):
+        """ Returns the delivery counts at which keyframes were saved, in increasing order. """
+        names = os.listdir(keyframe_dir(self.path)) if os.path.isdir(keyframe_dir(self.path)) else []
+        return sorted(int(name[:-5]) for name in names if name.endswith(".stpc"))
+
+
+def replay(path: str, index: int, scheduler: object = None):
+    """
+    Returns a Topology in the state it had after `index` deliveries of the traced run. The
+    nearest keyframe at or before index is loaded and the traced messages after it are delivered
+    again, exactly as Topology.deliver_messages would, while the restored queue is popped in step
+    so it stays in sync with a deterministic scheduler.
+    """
+    reader = TraceReader(path)
+    if not 0 <= index <= len(reader):
+        raise IndexError(f"trace {path} has {len(reader)} messages, cannot replay to {index}")
+    start = max((keyframe for keyframe in reader.keyframes() if keyframe <= index), default=None)
+    if start is None:
+        raise ValueError(f"trace {path} has no keyframe at or before {index}")
+
+    topology = load_checkpoint(os.path.join(keyframe_dir(path), f"{start}.stpc"), scheduler=scheduler,
+                               incremental_drops=reader.incremental_drops)
+    for position in range(start, index):
+        if topology.scheduler:
+            topology.scheduler.pop()
+        msg = reader[position]
+        topology.switches[msg.destination].process_message(msg)
+        if msg.ttl == 0 and not topology.drop_complete:
+            topology.apply_drops()
+    return topology
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild simulation state from a message trace")
+    parser.add_argument("trace_file")
+    parser.add_argument("index", type=int, help="number of delivered messages to replay")
+    parser.add_argument("--log", help="write the spanning tree at that point to this file")
+    parser.add_argument("--messages", type=int, default=0, help="print this many traced messages from index")
+    args = parser.parse_args()
+
+    reader = TraceReader(args.trace_file)
+    for position in range(args.index, min(args.index + args.messages, len(reader))):
+        print(f"{position}: {reader[position]}")
+    if args.log:
+        replay(args.trace_file, args.index).log_spanning_tree(args.log)
+
+
+if __name__ == "__main__":
+    main()
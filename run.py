@@ -33,14 +33,66 @@
 #     python run.py <topology_file>
 # For example, to run jellyfish_topo.py and log the results to jellyfish_topo.log, use the following command:
 #     python run.py jellyfish_topo
-# Note that the topology file should NOT have the .py extension.
+# Note that a topology module name should NOT have the .py extension; a path to an existing .py file
+# is loaded as given. Data-only topologies are given by path with their extension, e.g.
+# python run.py topologies/fat_tree.json (see TopologyLoader.py).
+#
+# Batch mode runs every topology in a directory (or matching a glob) in a process pool:
+#     python run.py --batch <directory_or_glob> [--workers N] [--output-dir DIR] [--expected-dir Logs]
+# Sweep mode converges a topology once, then drops every set of N switches from that shared state:
+#     python run.py --sweep <topology_file> [--drop-count N] [--full-restart] [--workers N] [--output-dir DIR]
+# The log is written as gzip-compressed text (<name>.log.gz) or in the binary adjacency format of
+# TopologyLoader.py (<name>.tree.stpb) with --log-format gzip or --log-format binary.
+# Every delivered message is recorded, with state keyframes, for replay with Trace.py using:
+#     python run.py <topology_file> --trace <file.stpt> [--keyframe-interval N]
+# Messages are verified on every send by default; --validation trusted skips the messages built
+# by the switches themselves, --validation sampled checks one in 64 and --validation off skips it.
+# The bsp and partitioned engines bypass the send path, so they take neither --validation nor
+# --stats or --memory-report.
+# Memory stays bounded with --max-in-flight N, which spills all but N queued messages to disk without
+# changing the delivery order (fifo engine only); --memory-report prints peak in-flight messages and state sizes.
+# Per-switch counters (see Instrumentation.py) are written as JSON or CSV with:
+#     python run.py <topology_file> --stats <file.json|file.csv>
+# Messages that duplicate one already waiting on the same link and could not change anything are
+# dropped with --coalesce
+# (fifo and partitioned engines only).
+# Each switch runs as its own asyncio task (see AsyncEngine.py), optionally with per-link latency, with:
+#     python run.py <topology_file> --engine async [--seed N] [--max-latency TICKS]
+# Rounds in which every pending message is delivered at once, vectorized with NumPy (see BspEngine.py):
+#     python run.py <topology_file> --engine bsp
+# The switches are split into partitions that run in separate worker processes (see PartitionedEngine.py) with:
+#     python run.py <topology_file> --engine partitioned [--partitions N] [--coalesce]
+# The simulation stops as soon as the tree is provably stable (see Convergence.py) with --early-stop;
+# --stable-window N stops after N deliveries without any change instead, without the proof (fifo engine only).
+# A run can be paused after N deliveries and its full state saved (see Checkpoint.py), then resumed:
+#     python run.py <topology_file> --pause-after N --checkpoint <file.stpc>
+#     python run.py --resume <file.stpc> [--checkpoint <file.stpc>]
+# Repeated runs of the same config can skip parsing and neighbor verification by loading it from
+# a compiled-topology cache (see TopologyCache.py):
+#     python run.py <topology_file> --topology-cache <directory> [--cache-size MB]
+# Finished runs are memoized on disk (see ResultCache.py); a rerun of the same config, drops and
+# options restores the converged tree and log instead of simulating it again:
+#     python run.py <topology_file> --result-cache <directory>
+# Links and switches can go down and come back up during a run (see LinkEvents.py); the cost of
+# each event is printed at the end:
+#     python run.py <topology_file> --events <events_file>
+# A discrete-event run in simulated time, with the per-link latency and bandwidth of the config
+# (see TimedEngine.py and TopologyLoader.py), reports the simulated time to convergence:
+#     python run.py <topology_file> --engine timed [--latency T] [--bandwidth B]
 # Students should NOT modify this file.
 #
 # Copyright 2023 Vincent Hu
 #           Based on prior work by Sean Donovan, Jared Scott, James Lohse, and Michael Brown
 
+import argparse
+import os
 import sys
 from Topology import *
+from Scheduler import CoalescingScheduler, SpillingScheduler
+from Convergence import ConvergenceDetector
+
+DATA_EXTENSIONS = (".json", ".edges", ".stpb")
+LOG_EXTENSIONS = {"text": ".log", "gzip": ".log.gz", "binary": ".tree.stpb"}
 
 PYTHON_VERSION = 3
 PYTHON_RELEASE = 11
@@ -51,23 +103,174 @@ if sys.version_info < (PYTHON_VERSION, PYTHON_RELEASE):
     print(f"    Please be sure you are using at least Python {PYTHON_VERSION}.{PYTHON_RELEASE}.x")
     exit()
 
-if len(sys.argv) != 2:
-    print("Syntax:")
-    print("    python run.py <topology_file>")
-    exit()
 
-topology_file = sys.argv[1]
-# Check topology_file
-if topology_file.endswith('.py'):
-    topology_file = topology_file[:-3]
-    print("Syntax:")
-    print("    Note that the topology parameter should not have the .py extension.")
-    print("    Removing the '.py' extension...")
+def main():
+    parser = argparse.ArgumentParser(usage="python run.py <topology_file>")
+    parser.add_argument("topology_file", nargs="?")
+    parser.add_argument("--batch", metavar="DIRECTORY_OR_GLOB", help="run every matching topology file")
+    parser.add_argument("--workers", type=int, default=None, help="batch worker processes (default: CPU count)")
+    parser.add_argument("--output-dir", default=".", help="where batch mode writes logs and summary.txt")
+    parser.add_argument("--expected-dir", default="Logs", help="expected logs to compare against in batch mode")
+    parser.add_argument("--sweep", metavar="TOPOLOGY", help="evaluate every drop set of a topology")
+    parser.add_argument("--drop-count", type=int, default=1, help="switches dropped per sweep scenario")
+    parser.add_argument("--full-restart", action="store_true",
+                        help="restart the whole topology in each sweep scenario instead of dropping incrementally")
+    parser.add_argument("--stats", metavar="FILE", help="export instrumentation counters to a .json or .csv file")
+    parser.add_argument("--coalesce", action="store_true", help="drop duplicate messages that cannot change the tree")
+    parser.add_argument("--max-in-flight", type=int, metavar="N",
+                        help="keep at most N (at least 2) messages in memory and spill the rest to disk")
+    parser.add_argument("--memory-report", action="store_true", help="print peak message and switch state memory")
+    parser.add_argument("--early-stop", action="store_true", help="stop once the tree is provably stable")
+    parser.add_argument("--stable-window", type=int, metavar="N",
+                        help="stop after N deliveries that change no switch (no stability proof)")
+    parser.add_argument("--log-format", choices=sorted(LOG_EXTENSIONS), default="text",
+                        help="write the log as text, gzip-compressed text or binary adjacency")
+    parser.add_argument("--checkpoint", metavar="FILE", help="save the simulation state to FILE when it stops")
+    parser.add_argument("--pause-after", type=int, metavar="N", help="stop after delivering N messages")
+    parser.add_argument("--resume", metavar="FILE", help="continue the simulation saved in a checkpoint")
+    parser.add_argument("--trace", metavar="FILE", help="record every delivered message to FILE (see Trace.py)")
+    parser.add_argument("--keyframe-interval", type=int, default=100000, metavar="N",
+                        help="deliveries between the state keyframes saved with --trace")
+    parser.add_argument("--validation", choices=VALIDATION_POLICIES,
+                        help="message validation policy on the send path (default: full, see Topology)")
+    parser.add_argument("--topology-cache", metavar="DIRECTORY",
+                        help="load the topology from a cache of compiled topologies in DIRECTORY")
+    parser.add_argument("--cache-size", type=int, default=1024, metavar="MB",
+                        help="disk space kept by --topology-cache (default: 1024)")
+    parser.add_argument("--result-cache", metavar="DIRECTORY",
+                        help="reuse converged results stored in DIRECTORY (fifo engine only)")
+    parser.add_argument("--events", metavar="FILE", help="apply the link and switch events in FILE during the run")
+    parser.add_argument("--engine", choices=["fifo", "async", "bsp", "partitioned", "timed"], default="fifo", help="simulation engine")
+    parser.add_argument("--partitions", type=int, default=None,
+                        help="worker processes for the partitioned engine (default: CPU count)")
+    parser.add_argument("--latency", type=float, default=1.0,
+                        help="latency of links without one in the config (timed engine)")
+    parser.add_argument("--bandwidth", type=float, default=None,
+                        help="messages per time unit on links without a bandwidth in the config (timed engine)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the async engine's link latencies")
+    parser.add_argument("--max-latency", type=int, default=0, help="maximum per-link latency in ticks (async engine)")
+    args = parser.parse_args()
+    if args.max_in_flight is not None and args.max_in_flight < 2:
+        parser.error("--max-in-flight must be at least 2")
+    if args.coalesce and args.max_in_flight:
+        parser.error("--coalesce and --max-in-flight cannot be combined")
+    if args.coalesce and args.engine not in ("fifo", "partitioned"):
+        parser.error("--coalesce is only supported by the fifo and partitioned engines")
+    if args.engine != "fifo" and (args.max_in_flight or args.early_stop or args.stable_window):
+        parser.error("--max-in-flight, --early-stop and --stable-window are only supported by the fifo engine")
+    if args.engine != "fifo" and (args.checkpoint or args.pause_after is not None or args.resume or args.trace):
+        parser.error("checkpoints and traces are only supported by the fifo engine")
+    if args.engine in ("bsp", "partitioned") and (args.stats or args.validation or args.memory_report):
+        # These engines deliver messages without Topology.send_message or the switches' process_message
+        parser.error("--stats, --validation and --memory-report are not supported by the bsp and partitioned engines")
+    if args.events and (args.engine != "fifo" or args.checkpoint or args.pause_after is not None
+                        or args.resume or args.trace or args.result_cache):
+        parser.error("--events only covers complete fifo runs without checkpoints, traces or result caching")
+    if args.result_cache and (args.engine != "fifo" or args.checkpoint or args.pause_after is not None
+                              or args.resume or args.trace or args.stats):
+        parser.error("--result-cache only covers complete fifo runs without checkpoints, traces or stats")
+
+    if args.batch:
+        from BatchRunner import run_batch
+        run_batch(args.batch, args.workers, args.output_dir, args.expected_dir)
+        return
+
+    if args.sweep:
+        from FailureSweep import run_sweep
+        run_sweep(args.sweep, args.drop_count, args.workers, args.output_dir, not args.full_restart)
+        return
+
+    if args.topology_file is None and args.resume is None:
+        print("Syntax:")
+        print("    python run.py <topology_file>")
+        return
+
+    # Populate the topology
+    scheduler = CoalescingScheduler() if args.coalesce else None
+    if args.max_in_flight:
+        scheduler = SpillingScheduler(args.max_in_flight)
+    convergence = None
+    if args.stable_window:
+        convergence = ConvergenceDetector(window=args.stable_window, require_proof=False)
+    elif args.early_stop:
+        convergence = ConvergenceDetector()
+    if args.resume:
+        from Checkpoint import load_checkpoint
+        log_name = os.path.splitext(args.resume)[0]
+        topo = load_checkpoint(args.resume, scheduler=scheduler, convergence=convergence,
+                               validation=args.validation or "full")
+    else:
+        topology_file = args.topology_file
+        # Check topology_file; a path to an existing .py file is loaded as it is
+        if topology_file.endswith('.py') and not os.path.isfile(topology_file):
+            topology_file = topology_file[:-3]
+            print("Syntax:")
+            print("    Note that the topology parameter should not have the .py extension.")
+            print("    Removing the '.py' extension...")
+        # Data-only configs (.json, .edges, .stpb) and .py files are loaded by path and logged next to the input
+        log_name = os.path.splitext(topology_file)[0] if topology_file.endswith(DATA_EXTENSIONS + (".py",)) \
+            else topology_file
+        if args.topology_cache:
+            from TopologyCache import TopologyCache
+            topology_file = TopologyCache(args.topology_cache, args.cache_size << 20).load(topology_file)
+        topo = Topology(topology_file, scheduler=scheduler, convergence=convergence,
+                        validation=args.validation or "full")
+    if args.stats:
+        from Instrumentation import Instrumentation
+        instrumentation = Instrumentation().attach(topo)
+    if args.trace:
+        from Trace import TraceRecorder
+        recorder = TraceRecorder(args.trace, args.keyframe_interval).attach(topo)
+
+    # Run the topology
+    if args.engine == "async":
+        from AsyncEngine import AsyncEngine
+        AsyncEngine(topo, seed=args.seed, max_latency=args.max_latency).run()
+    elif args.engine == "bsp":
+        from BspEngine import BspEngine
+        BspEngine(topo).run()
+    elif args.engine == "partitioned":
+        from PartitionedEngine import PartitionedEngine
+        PartitionedEngine(topo, args.partitions, coalesce=args.coalesce).run()
+    elif args.engine == "timed":
+        from TimedEngine import TimedEngine
+        engine = TimedEngine(topo, args.latency, args.bandwidth)
+        engine.run()
+        stats = engine.stats()
+        print(f"Converged at simulated time {stats['converged_at']:g} (last delivery at {stats['simulated_time']:g}), "
+              f"{stats['delivered']} messages in {stats['steps']} steps, "
+              f"{stats['events_per_second']:.0f} messages/s")
+    elif args.events:
+        from LinkEvents import EventSchedule, load_events
+        schedule = EventSchedule(load_events(args.events))
+        schedule.run(topo)
+        print(schedule.format_results(), end="")
+    elif args.result_cache:
+        from ResultCache import ResultCache
+        # The cache writes the log itself; binary logs are still written from the restored switches
+        ResultCache(args.result_cache).run(topo, log_name + LOG_EXTENSIONS[args.log_format])
+    elif args.resume:
+        topo.deliver_messages(args.pause_after)
+    else:
+        topo.restart_topology_messages()
+        topo.deliver_messages(args.pause_after)
+    if args.trace:
+        recorder.close()
+    if args.checkpoint:
+        from Checkpoint import save_checkpoint
+        save_checkpoint(topo, args.checkpoint)
+    # Close the logfile
+    if not args.result_cache:
+        topo.log_spanning_tree(log_name + LOG_EXTENSIONS[args.log_format])
+    if args.stats:
+        instrumentation.export(args.stats)
+    if args.memory_report:
+        from MemoryProfile import format_memory_report, memory_report
+        print(format_memory_report(memory_report(topo)), end="")
+    if args.coalesce and args.engine != "partitioned":
+        print(f"Coalescing saved {scheduler.saved_percent():.1f}% of messages")
 
-# Populate the topology
-topo = Topology(topology_file)
 
-# Run the topology
-topo.run_spanning_tree()
-# Close the logfile
-topo.log_spanning_tree(f"{topology_file}.log")
+# Batch mode starts worker processes, which may re-import this file, so only run from the command line
+if __name__ == "__main__":
+    main()
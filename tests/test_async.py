@@ -0,0 +1,33 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Without latency the AsyncEngine must deliver in FIFO order and produce the same tree.
+
+import pytest
+
+from AsyncEngine import AsyncEngine
+from Topology import Topology
+from TopologyGenerator import generate
+
+CASES = [("grid", 10, 3, 0, 13), ("grid", 20, 3, 2, 1), ("jellyfish", 16, 4, 1, 2), ("scale_free", 20, 3, 2, 0)]
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("family, size, ttl_limit, drops, seed", CASES)
+def test_async_logs_match_fifo_without_latency(family, size, ttl_limit, drops, seed):
+    fifo = Topology(generate(family, size, ttl_limit, drops, seed))
+    fifo.run_spanning_tree()
+    topology = Topology(generate(family, size, ttl_limit, drops, seed))
+    engine = AsyncEngine(topology)
+    engine.run()
+    assert log_lines(topology) == log_lines(fifo)
+    assert engine.delivered == fifo.scheduler.delivered
+
+
+def test_async_run_with_latency_terminates():
+    topology = Topology(generate("grid", 16, 4, 1, 5))
+    engine = AsyncEngine(topology, seed=3, max_latency=4)
+    engine.run()
+    assert engine.delivered > 0 and len(engine) == 0
@@ -0,0 +1,47 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Topologies and results served from the caches must run and log exactly like uncached ones.
+
+from ResultCache import ResultCache
+from Topology import Topology
+from TopologyCache import TopologyCache
+from TopologyGenerator import generate
+from TopologyLoader import dump_json
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+def test_topology_cache_round_trip(tmp_path):
+    path = str(tmp_path / "topology.json")
+    dump_json(generate("jellyfish", 20, 4, 2, 7), path)
+    expected = Topology(path)
+    expected.run_spanning_tree()
+
+    cache = TopologyCache(str(tmp_path / "cache"))
+    for _ in range(2):
+        topology = Topology(cache.load(path))
+        topology.run_spanning_tree()
+        assert log_lines(topology) == log_lines(expected)
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_result_cache_round_trip(tmp_path):
+    config = lambda: generate("grid", 16, 4, 2, 3)
+    expected = Topology(config())
+    expected.run_spanning_tree()
+    expected.log_spanning_tree(str(tmp_path / "expected.log"))
+    with open(tmp_path / "expected.log") as infile:
+        expected_log = infile.read()
+
+    directory = str(tmp_path / "results")
+    for cache, hit in ((ResultCache(directory), False), (ResultCache(directory), True)):
+        topology = Topology(config())
+        log = str(tmp_path / "cached.log")
+        assert cache.run(topology, log) == hit
+        assert log_lines(topology) == log_lines(expected)
+        assert sorted(topology.switches) == sorted(expected.switches)
+        with open(log) as infile:
+            assert infile.read() == expected_log
+    assert cache.stats()["disk_hits"] == 1
@@ -0,0 +1,45 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# A run paused, saved and resumed from a checkpoint must end exactly like an uninterrupted one.
+
+import pytest
+
+from Checkpoint import load_checkpoint, save_checkpoint
+from Scheduler import BatchScheduler
+from Topology import Topology
+from TopologyGenerator import generate
+
+CASES = [("grid", 16, 4, 2, 0), ("jellyfish", 20, 4, 1, 3), ("scale_free", 16, 5, 2, 1)]
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("incremental_drops", [False, True])
+@pytest.mark.parametrize("family, size, ttl_limit, drops, seed", CASES)
+def test_resumed_logs_match_fifo(tmp_path, family, size, ttl_limit, drops, seed, incremental_drops):
+    fifo = Topology(generate(family, size, ttl_limit, drops, seed), incremental_drops=incremental_drops)
+    fifo.run_spanning_tree()
+    total = fifo.scheduler.delivered
+    path = str(tmp_path / "run.stpc")
+    for pause in (1, total // 3, 2 * total // 3, total):
+        for scheduler in (None, BatchScheduler):
+            paused = Topology(generate(family, size, ttl_limit, drops, seed), incremental_drops=incremental_drops)
+            paused.restart_topology_messages()
+            paused.deliver_messages(pause)
+            save_checkpoint(paused, path)
+            resumed = load_checkpoint(path, incremental_drops=incremental_drops,
+                                      scheduler=scheduler() if scheduler else None)
+            resumed.deliver_messages()
+            assert log_lines(resumed) == log_lines(fifo)
+            assert resumed.scheduler.delivered == total
+
+
+def test_resume_keeps_validation_policy(tmp_path):
+    path = str(tmp_path / "run.stpc")
+    topology = Topology(generate("grid", 9, 3, 0, 0))
+    topology.restart_topology_messages()
+    topology.deliver_messages(5)
+    save_checkpoint(topology, path)
+    assert load_checkpoint(path, validation="off").validation == "off"
@@ -0,0 +1,37 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# The CoalescingScheduler must produce the same tree as the FifoScheduler, drops included.
+
+import pytest
+
+from ReferenceSolver import ReferenceSolver
+from Scheduler import CoalescingScheduler
+from Topology import Topology
+from TopologyGenerator import generate
+
+CASES = [("grid", 10, 2, 2, 14)] + [(family, 16, ttl, drops, seed)
+                                    for family in ("grid", "jellyfish", "scale_free")
+                                    for ttl, drops in ((3, 0), (4, 1), (5, 2))
+                                    for seed in range(4)]
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("family, size, ttl_limit, drops, seed", CASES)
+def test_coalesced_logs_match_fifo(family, size, ttl_limit, drops, seed):
+    fifo = Topology(generate(family, size, ttl_limit, drops, seed))
+    fifo.run_spanning_tree()
+    scheduler = CoalescingScheduler()
+    coalesced = Topology(generate(family, size, ttl_limit, drops, seed), scheduler=scheduler)
+    coalesced.run_spanning_tree()
+    assert log_lines(coalesced) == log_lines(fifo)
+    assert scheduler.delivered <= fifo.scheduler.delivered
+
+
+def test_coalesced_logs_match_reference_after_drops():
+    config = generate("grid", 10, 2, 2, 14)
+    topology = Topology(config, scheduler=CoalescingScheduler())
+    topology.run_spanning_tree()
+    assert log_lines(topology) == list(ReferenceSolver(config.topo, config.drops).log_lines())
@@ -0,0 +1,44 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Stopping early must leave the same tree as delivering every message.
+
+import pytest
+
+from Convergence import ConvergenceDetector
+from Scheduler import BatchScheduler, CoalescingScheduler, SpillingScheduler
+from Topology import Topology
+from TopologyGenerator import generate
+
+CASES = [(family, 16, ttl_limit, drops, seed) for family in ("grid", "jellyfish", "scale_free")
+         for ttl_limit, drops in ((4, 0), (5, 2)) for seed in range(2)]
+SCHEDULERS = [None, BatchScheduler, CoalescingScheduler, lambda: SpillingScheduler(40)]
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("incremental_drops", [False, True])
+@pytest.mark.parametrize("family, size, ttl_limit, drops, seed", CASES)
+def test_early_stop_logs_match_fifo(family, size, ttl_limit, drops, seed, incremental_drops):
+    fifo = Topology(generate(family, size, ttl_limit, drops, seed), incremental_drops=incremental_drops)
+    fifo.run_spanning_tree()
+    for scheduler in SCHEDULERS:
+        convergence = ConvergenceDetector()
+        topology = Topology(generate(family, size, ttl_limit, drops, seed), incremental_drops=incremental_drops,
+                            scheduler=scheduler() if scheduler else None, convergence=convergence)
+        topology.run_spanning_tree()
+        assert log_lines(topology) == log_lines(fifo)
+        assert topology.scheduler.delivered <= fifo.scheduler.delivered
+
+
+def test_unsettled_count_matches_a_rescan():
+    convergence = ConvergenceDetector()
+    topology = Topology(generate("jellyfish", 20, 5, 2, 1), convergence=convergence)
+    topology.restart_topology_messages()
+    while topology.scheduler and not convergence.stopped_early:
+        unsettled = sum(1 for message in topology.scheduler
+                        if not topology.switches[message.destination].is_redundant(
+                            message.root, message.distance, message.origin, message.pathThrough))
+        assert convergence.unsettled == unsettled
+        topology.deliver_messages(97)
@@ -0,0 +1,28 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Incremental drops must converge to the same tree as restarting the whole topology.
+
+import pytest
+
+from Convergence import ConvergenceDetector
+from ReferenceSolver import ReferenceSolver
+from Topology import Topology
+from TopologyGenerator import generate
+
+CASES = [(family, 16, 7, drops, seed) for family in ("grid", "jellyfish", "scale_free")
+         for drops in (1, 3) for seed in range(3)]
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("family, size, ttl_limit, drops, seed", CASES)
+def test_incremental_drops_match_full_restart(family, size, ttl_limit, drops, seed):
+    config = generate(family, size, ttl_limit, drops, seed)
+    expected = list(ReferenceSolver(config.topo, config.drops).log_lines())
+    for incremental_drops in (False, True):
+        topology = Topology(generate(family, size, ttl_limit, drops, seed), incremental_drops=incremental_drops,
+                            convergence=ConvergenceDetector())
+        topology.run_spanning_tree()
+        assert log_lines(topology) == expected
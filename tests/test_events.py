@@ -0,0 +1,63 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Live link and switch changes must reconverge to the tree of the changed topology.
+
+import random
+
+import pytest
+
+from Convergence import ConvergenceDetector
+from Message import Message
+from ReferenceSolver import ReferenceSolver
+from Scheduler import CoalescingScheduler, FifoScheduler
+from Topology import Topology
+from TopologyGenerator import generate
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("scheduler", [FifoScheduler, CoalescingScheduler])
+@pytest.mark.parametrize("family, seed", [(family, seed) for family in ("grid", "jellyfish", "scale_free")
+                                          for seed in range(3)])
+def test_live_changes_reconverge_to_reference(family, seed, scheduler):
+    topology = Topology(generate(family, 16, 10, 0, seed), scheduler=scheduler(),
+                        convergence=ConvergenceDetector())
+    topology.run_spanning_tree()
+    rng = random.Random(seed)
+    down = []
+    for _ in range(8):
+        choice = rng.random()
+        if choice < 0.3:
+            switchId = rng.choice(sorted(topology.switches))
+            topology.remove_switch(switchId)
+            down.append(switchId)
+        elif choice < 0.5 and down:
+            topology.add_switch(down.pop())
+        else:
+            a = rng.choice(sorted(topology.switches))
+            if topology.conf_topo[a]:
+                b = rng.choice(topology.conf_topo[a])
+                topology.remove_link(a, b)
+                if rng.random() < 0.5:
+                    topology.add_link(a, b)
+        topology.deliver_messages(rng.randint(0, 50))
+    topology.deliver_messages()
+    live = {key: list(topology.conf_topo[key]) for key in topology.switches}
+    assert log_lines(topology) == list(ReferenceSolver(live).log_lines())
+
+
+def test_discard_skips_only_older_messages_on_the_links():
+    scheduler = FifoScheduler()
+    for origin, destination in ((1, 2), (2, 1), (1, 3), (1, 2)):
+        scheduler.push(Message(1, 0, origin, destination, False, 1))
+    scheduler.discard([(1, 2)])
+    scheduler.push(Message(1, 0, 1, 2, False, 1))
+    assert [(message.origin, message.destination) for message in scheduler] == [(2, 1), (1, 3), (1, 2)]
+    popped = []
+    while scheduler:
+        message = scheduler.pop()
+        popped.append((message.origin, message.destination))
+    assert popped == [(2, 1), (1, 3), (1, 2)]
+    assert scheduler.delivered == 3 and scheduler.discarded == 2
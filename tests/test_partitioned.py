@@ -0,0 +1,27 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# The PartitionedEngine must produce the same tree as the serial FIFO engine, drops included.
+
+import pytest
+
+from PartitionedEngine import PartitionedEngine
+from Topology import Topology
+from TopologyGenerator import generate
+
+CASES = [("grid", 20, 3, 2, 25), ("grid", 25, 4, 1, 3), ("jellyfish", 20, 3, 2, 1),
+         ("scale_free", 30, 3, 3, 2), ("torus", 16, 5, 0, 0)]
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("partitions", [2, 3])
+@pytest.mark.parametrize("coalesce", [False, True])
+@pytest.mark.parametrize("family, size, ttl_limit, drops, seed", CASES)
+def test_partitioned_logs_match_fifo(family, size, ttl_limit, drops, seed, coalesce, partitions):
+    fifo = Topology(generate(family, size, ttl_limit, drops, seed))
+    fifo.run_spanning_tree()
+    topology = Topology(generate(family, size, ttl_limit, drops, seed))
+    PartitionedEngine(topology, partitions, coalesce=coalesce).run()
+    assert log_lines(topology) == log_lines(fifo)
@@ -0,0 +1,43 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# The SpillingScheduler must deliver in FIFO order while holding at most max_in_memory messages.
+
+import pytest
+
+from MemoryProfile import memory_report
+from Scheduler import SpillingScheduler
+from Topology import Topology
+from TopologyGenerator import generate
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("max_in_memory, segment_size", [(2, None), (7, 3), (50, None), (50, 1)])
+def test_spilled_logs_match_fifo_within_bound(max_in_memory, segment_size):
+    fifo = Topology(generate("jellyfish", 20, 4, 2, 3))
+    fifo.run_spanning_tree()
+    scheduler = SpillingScheduler(max_in_memory, segment_size)
+    topology = Topology(generate("jellyfish", 20, 4, 2, 3), scheduler=scheduler)
+    topology.run_spanning_tree()
+    assert log_lines(topology) == log_lines(fifo)
+    assert scheduler.delivered == fifo.scheduler.delivered
+    assert scheduler.spilled > 0
+    assert scheduler.peak_in_memory <= max_in_memory
+    assert scheduler.peak_front + scheduler.peak_back <= 2 * max_in_memory
+
+
+def test_memory_report_prices_rows_separately():
+    scheduler = SpillingScheduler(10)
+    topology = Topology(generate("grid", 16, 4, 0, 0), scheduler=scheduler)
+    topology.run_spanning_tree()
+    report = memory_report(topology)
+    assert report["peak_in_flight_bytes"] == (scheduler.peak_front * report["message_object_bytes"]
+                                              + scheduler.peak_back * report["message_row_bytes"])
+
+
+@pytest.mark.parametrize("max_in_memory, segment_size", [(1, None), (10, 6), (10, 0)])
+def test_invalid_sizes_are_rejected(max_in_memory, segment_size):
+    with pytest.raises(ValueError):
+        SpillingScheduler(max_in_memory, segment_size)
@@ -0,0 +1,32 @@
+# Spanning Tree Protocol project for GA Tech OMSCS CS-6250: Computer Networks
+#
+# Replaying a trace must rebuild the exact state of the traced run after any number of deliveries.
+
+import pytest
+
+from Topology import Topology
+from Trace import TraceReader, TraceRecorder, replay
+from TopologyGenerator import generate
+
+
+def log_lines(topology):
+    return [topology.switches[key].generate_logstring() for key in sorted(topology.switches)]
+
+
+@pytest.mark.parametrize("incremental_drops", [False, True])
+def test_replay_matches_the_traced_run(tmp_path, incremental_drops):
+    path = str(tmp_path / "run.stpt")
+    config = lambda: generate("jellyfish", 16, 4, 2, 5)
+    traced = Topology(config(), incremental_drops=incremental_drops)
+    recorder = TraceRecorder(path, keyframe_interval=50).attach(traced)
+    traced.run_spanning_tree()
+    recorder.close()
+    total = traced.scheduler.delivered
+    assert len(TraceReader(path)) == total
+
+    for index in (0, 1, 49, 50, 51, total // 2, total):
+        expected = Topology(config(), incremental_drops=incremental_drops)
+        expected.restart_topology_messages()
+        expected.deliver_messages(index)
+        assert log_lines(replay(path, index)) == log_lines(expected)
+    assert log_lines(replay(path, total)) == log_lines(traced)